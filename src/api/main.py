@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
+from src.api import routes
 from src.api.routes import router
 from src.api.middleware import (
     CorrelationIDMiddleware,
@@ -27,6 +28,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("application_stopping")
+    if routes._embedding_generator is not None:
+        await routes._embedding_generator.aclose()
+    if routes._vector_store is not None:
+        await routes._vector_store.aclose()
 
 
 # Create FastAPI app
@@ -75,6 +80,7 @@ if __name__ == "__main__":
         "src.api.main:app",
         host=settings.api_host,
         port=settings.api_port,
+        loop="uvloop",
         reload=settings.environment == "development",
         workers=settings.api_workers if settings.environment == "production" else 1,
         log_level=settings.log_level.lower()
@@ -1,7 +1,8 @@
-from fastapi import Request, Response, HTTPException
+from fastapi import HTTPException
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Callable, Dict, Any
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict
 import os
 import time
 import uuid
@@ -14,133 +15,176 @@ from src.config import settings
 logger = get_logger(__name__)
 
 
-class CorrelationIDMiddleware(BaseHTTPMiddleware):
+class CorrelationIDMiddleware:
     """Add correlation ID to all requests."""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         correlation_id = str(uuid.uuid4())
-        request.state.correlation_id = correlation_id
-        
-        response = await call_next(request)
-        response.headers["X-Correlation-ID"] = correlation_id
-        
-        return response
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+
+        async def send_with_correlation_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Correlation-ID"] = correlation_id
+            await send(message)
+
+        await self.app(scope, receive, send_with_correlation_id)
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+class LoggingMiddleware:
     """Log all requests and responses."""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
-        
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_ns = time.perf_counter_ns()
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+
         # Get correlation ID
-        correlation_id = getattr(request.state, "correlation_id", "unknown")
-        
-        # Log request
-        logger.info(
-            "request_started",
+        correlation_id = scope.get("state", {}).get("correlation_id", "unknown")
+
+        # Bind the request context once; later events only add what changed
+        log = logger.bind(
             **log_request(
                 correlation_id=correlation_id,
-                method=request.method,
-                path=request.url.path,
-                client_host=request.client.host if request.client else None,
+                method=method,
+                path=path,
+                client_host=client[0] if client else None,
             )
         )
-        
+        log.info("request_started")
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
         try:
-            response = await call_next(request)
-            duration = time.time() - start_time
-            
-            # Log response
-            logger.info(
-                "request_completed",
-                correlation_id=correlation_id,
-                status_code=response.status_code,
-                duration=duration,
-            )
-            
-            # Track metrics
-            track_request(
-                method=request.method,
-                endpoint=request.url.path,
-                status_code=response.status_code,
-                duration=duration
-            )
-            
-            return response
-            
+            await self.app(scope, receive, send_with_status)
         except Exception as e:
-            duration = time.time() - start_time
-            logger.error(
-                "request_failed",
-                **log_error(e, correlation_id=correlation_id),
-                duration=duration,
-            )
-            track_error(error_type=type(e).__name__, endpoint=request.url.path)
+            duration = (time.perf_counter_ns() - start_ns) / 1e9
+            log.error("request_failed", **log_error(e), duration=duration)
+            track_error(error_type=type(e).__name__, endpoint=path)
             raise
 
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+        # Log response
+        log.info("request_completed", status_code=status_code, duration=duration)
+
+        # Track metrics
+        track_request(
+            method=method,
+            endpoint=path,
+            status_code=status_code,
+            duration=duration
+        )
+
+
+class RateLimitMiddleware:
     """Simple rate limiting middleware."""
-    
-    def __init__(self, app):
-        super().__init__(app)
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.requests: Dict[str, list] = defaultdict(list)
         self.rate_limit = settings.rate_limit_per_minute
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # Skip rate limiting in test environment or if explicitly disabled
-        if os.getenv("ENVIRONMENT") == "test" or os.getenv("DISABLE_RATE_LIMIT") == "true":
-            return await call_next(request)
-            
-        client_ip = request.client.host if request.client else "unknown"
+        if (
+            scope["type"] != "http"
+            or os.getenv("ENVIRONMENT") == "test"
+            or os.getenv("DISABLE_RATE_LIMIT") == "true"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
         now = datetime.now()
-        
+
         # Clean old requests
         minute_ago = now.timestamp() - 60
         self.requests[client_ip] = [
             req_time for req_time in self.requests[client_ip]
             if req_time > minute_ago
         ]
-        
+
         # Check rate limit
         if len(self.requests[client_ip]) >= self.rate_limit:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=429,
                 content={
                     "error": "Rate limit exceeded",
                     "message": f"Maximum {self.rate_limit} requests per minute"
                 }
             )
-        
+            await response(scope, receive, send)
+            return
+
         # Record request
         self.requests[client_ip].append(now.timestamp())
-        
-        response = await call_next(request)
-        return response
 
+        await self.app(scope, receive, send)
 
-class ErrorHandlerMiddleware(BaseHTTPMiddleware):
+
+class ErrorHandlerMiddleware:
     """Global error handler middleware."""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_tracking_start(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_tracking_start)
         except HTTPException:
             raise
         except Exception as e:
-            correlation_id = getattr(request.state, "correlation_id", "unknown")
+            correlation_id = scope.get("state", {}).get("correlation_id", "unknown")
             logger.error(
                 "unhandled_error",
                 **log_error(e, correlation_id=correlation_id),
-                path=request.url.path,
+                path=scope["path"],
             )
-            
-            return JSONResponse(
+
+            # Headers are already on the wire, nothing left to replace
+            if response_started:
+                raise
+
+            response = JSONResponse(
                 status_code=500,
                 content={
                     "error": "Internal server error",
                     "correlation_id": correlation_id,
                     "message": "An unexpected error occurred"
                 }
-            )
\ No newline at end of file
+            )
+            await response(scope, receive, send)
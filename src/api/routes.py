@@ -3,7 +3,7 @@ from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 import uuid
-import json
+import orjson
 from datetime import datetime
 
 from src.processing.validation import DocumentValidator
@@ -712,24 +712,28 @@ async def get_logs(
             corr_key = f"logs:correlation:{correlation_id}"
             log_keys = redis_client.lrange(corr_key, 0, limit - 1)
             filtered_by = f"correlation_id: {correlation_id}"
+        elif level:
+            # Read the level index rather than filtering recent logs
+            log_keys = redis_client.lrange(f"logs:level:{level.lower()}", 0, limit - 1)
+            filtered_by = None
         else:
             # Get recent logs
             log_keys = redis_client.lrange("logs:recent", 0, limit - 1)
             filtered_by = None
         
-        # Fetch log entries
-        for log_key in log_keys:
-            log_data = redis_client.get(log_key)
+        # Fetch log entries in a single round trip
+        log_values = redis_client.mget(log_keys) if log_keys else []
+        for log_key, log_data in zip(log_keys, log_values):
             if log_data:
                 try:
-                    log_entry = json.loads(log_data)
+                    log_entry = orjson.loads(log_data)
                     
                     # Filter by level if specified
                     if level and log_entry.get("level", "").lower() != level.lower():
                         continue
                         
                     logs.append(log_entry)
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     logger.warning("invalid_log_entry", key=log_key)
         
         if level and not correlation_id:
@@ -768,13 +772,13 @@ async def get_profiling_stats(
         log_keys = redis_client.lrange("logs:recent", 0, time_range * 20)
         
         all_logs = []
-        for log_key in log_keys:
-            log_data = redis_client.get(log_key)
+        log_values = redis_client.mget(log_keys) if log_keys else []
+        for log_data in log_values:
             if log_data:
                 try:
-                    log_entry = json.loads(log_data)
+                    log_entry = orjson.loads(log_data)
                     all_logs.append(log_entry)
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     continue
         
         # Analyze performance
@@ -801,40 +805,7 @@ async def recreate_collection():
     """Temporary endpoint to recreate Qdrant collection with correct dimension."""
     try:
         vector_store = get_vector_store()
-        
-        # Delete existing collection if it exists
-        try:
-            collections = vector_store.client.get_collections().collections
-            if any(c.name == vector_store.collection_name for c in collections):
-                logger.info(f"Deleting existing collection {vector_store.collection_name}")
-                vector_store.client.delete_collection(vector_store.collection_name)
-        except Exception as e:
-            logger.warning(f"Error deleting collection: {str(e)}")
-        
-        # Recreate collection with correct dimension
-        from qdrant_client.models import VectorParams, Distance
-        logger.info(f"Creating collection {vector_store.collection_name} with dimension {settings.embedding_dimension}")
-        
-        vector_store.client.create_collection(
-            collection_name=vector_store.collection_name,
-            vectors_config=VectorParams(
-                size=settings.embedding_dimension,
-                distance=Distance.COSINE
-            )
-        )
-        
-        # Create payload indices for filtering
-        vector_store.client.create_payload_index(
-            collection_name=vector_store.collection_name,
-            field_name="document_id",
-            field_schema="keyword"
-        )
-        
-        vector_store.client.create_payload_index(
-            collection_name=vector_store.collection_name,
-            field_name="document_type",
-            field_schema="keyword"
-        )
+        await vector_store.recreate_collection()
         
         return {
             "message": f"Collection {vector_store.collection_name} recreated successfully",
@@ -18,6 +18,8 @@ class Settings(BaseSettings):
     qdrant_url: str = Field(default="http://localhost:6333", env="QDRANT_URL")
     qdrant_api_key: Optional[str] = Field(default=None, env="QDRANT_API_KEY")
     qdrant_collection: str = Field(default="documents", env="QDRANT_COLLECTION")
+    qdrant_prefer_grpc: bool = Field(default=True, env="QDRANT_PREFER_GRPC")
+    qdrant_grpc_port: int = Field(default=6334, env="QDRANT_GRPC_PORT")
     
     # Redis Configuration
     redis_host: str = Field(default="localhost", env="REDIS_HOST")
@@ -35,15 +37,19 @@ class Settings(BaseSettings):
         env="EMBEDDING_MODEL"
     )
     embedding_dimension: int = Field(default=1536, env="EMBEDDING_DIMENSION")  # OpenAI text-embedding-3-small dimension
+    embedding_cache_size: int = Field(default=10000, env="EMBEDDING_CACHE_SIZE")
     
     # Search Configuration
     similarity_threshold: float = Field(default=0.4, env="SIMILARITY_THRESHOLD")
     search_limit: int = Field(default=10, env="SEARCH_LIMIT")
     hybrid_search_alpha: float = Field(default=0.5, env="HYBRID_SEARCH_ALPHA")
+    search_cache_size: int = Field(default=1024, env="SEARCH_CACHE_SIZE")
+    search_cache_ttl: float = Field(default=60.0, env="SEARCH_CACHE_TTL")  # Seconds
     
     # Monitoring Configuration
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     enable_metrics: bool = Field(default=True, env="ENABLE_METRICS")
+    aggregate_metrics: bool = Field(default=False, env="AGGREGATE_METRICS")
     
     # Security Configuration
     api_key_header: str = Field(default="X-API-Key", env="API_KEY_HEADER")
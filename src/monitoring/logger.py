@@ -1,129 +1,234 @@
+import atexit
+import functools
 import structlog
 import logging
 import sys
-import json
+import orjson
+import queue
 import redis
-import asyncio
+import threading
 from typing import Any, Dict, Optional
 from datetime import datetime
 from src.config import settings
+from src.monitoring.metrics import track_dropped_log
 
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
 
-class RedisLogProcessor:
-    """Processor that saves logs to Redis for display in UI."""
-    
-    def __init__(self):
-        self.redis_client = redis.Redis(
+
+def _dumps(event_dict: Dict[str, Any]) -> bytes:
+    """Serialize a log event with orjson, stringifying unknown types."""
+    return orjson.dumps(event_dict, default=str, option=ORJSON_OPTIONS)
+
+
+def _orjson_renderer(logger, method_name, event_dict) -> str:
+    """Render the final event as JSON for the stdlib handler."""
+    return _dumps(event_dict).decode()
+
+
+_redis_pool = None
+
+
+def get_redis_pool() -> redis.ConnectionPool:
+    """Get the connection pool shared by all log processors."""
+    global _redis_pool
+    if _redis_pool is None:
+        _redis_pool = redis.ConnectionPool(
             host=settings.redis_host,
             port=settings.redis_port,
             db=settings.redis_db,
-            decode_responses=True
+            decode_responses=True,
+            max_connections=32,
+            socket_keepalive=True,
+            health_check_interval=30
         )
+    return _redis_pool
+
+
+class RedisLogProcessor:
+    """Processor that saves logs to Redis for display in UI."""
+    
+    def __init__(self, batch_size: int = 500, max_queue_size: int = 10000):
+        self.redis_client = redis.Redis(connection_pool=get_redis_pool())
         self.ttl = 3600  # 1 hour retention
         self.max_recent_logs = 1000
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = None
     
     def __call__(self, logger, method_name, event_dict):
         # Let other processors run first
         if isinstance(event_dict, str):
             return event_dict
-            
-        # Save to Redis asynchronously to not block
+        
+        # Serialize now since later processors may mutate the event dict;
+        # the write itself happens on the background worker
+        get = event_dict.get
+        # Only stamp the time when no earlier processor did
+        timestamp = get('timestamp') or datetime.now().isoformat()
+        correlation_id = get('correlation_id', 'none')
+        log_key = f"log:{timestamp}:{correlation_id}:{id(event_dict)}"
+        try:
+            self._queue.put_nowait(
+                (log_key, _dumps(event_dict), correlation_id, get('level'))
+            )
+        except queue.Full:
+            # Drop the event rather than block the caller
+            track_dropped_log()
+        
+        return event_dict
+    
+    def start(self) -> None:
+        """Start the background worker that ships queued logs to Redis."""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._drain, daemon=True)
+            self._worker.start()
+            atexit.register(self.flush)
+    
+    def _drain(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            self._write(self._fill_batch(batch))
+    
+    def _fill_batch(self, batch):
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def flush(self) -> None:
+        """Write all queued logs to Redis, one pipeline per batch."""
+        while True:
+            batch = self._fill_batch([])
+            if not batch:
+                return
+            self._write(batch)
+    
+    def _write(self, batch) -> None:
         try:
-            self._save_to_redis(event_dict)
+            self._save_to_redis(batch)
         except Exception as e:
             # Don't fail if Redis is down
             print(f"Failed to save log to Redis: {e}")
-        
-        return event_dict
     
-    def _save_to_redis(self, event_dict):
-        """Save log entry to Redis."""
-        timestamp = event_dict.get('timestamp', datetime.now().isoformat())
-        correlation_id = event_dict.get('correlation_id', 'none')
-        
-        # Create unique key
-        log_key = f"log:{timestamp}:{correlation_id}:{id(event_dict)}"
+    def _save_to_redis(self, batch):
+        """Save a batch of log entries to Redis in a single round trip."""
+        pipe = self.redis_client.pipeline(transaction=False)
+        correlation_keys = set()
+        level_keys = set()
         
-        # Store individual log with TTL
-        self.redis_client.setex(
-            log_key,
-            self.ttl,
-            json.dumps(event_dict, default=str)
-        )
+        for log_key, payload, correlation_id, level in batch:
+            # Store individual log with TTL
+            pipe.setex(log_key, self.ttl, payload)
+            
+            # Add to recent logs list
+            pipe.lpush("logs:recent", log_key)
+            
+            # Add to correlation ID index
+            if correlation_id != 'none':
+                corr_key = f"logs:correlation:{correlation_id}"
+                pipe.lpush(corr_key, log_key)
+                correlation_keys.add(corr_key)
+            
+            # Add to level index so level queries skip unrelated logs
+            if level:
+                level_key = f"logs:level:{level}"
+                pipe.lpush(level_key, log_key)
+                level_keys.add(level_key)
         
-        # Add to recent logs list
-        self.redis_client.lpush("logs:recent", log_key)
-        self.redis_client.ltrim("logs:recent", 0, self.max_recent_logs - 1)
+        # Trim each list once per batch rather than once per entry
+        pipe.ltrim("logs:recent", 0, self.max_recent_logs - 1)
+        for corr_key in correlation_keys:
+            pipe.expire(corr_key, self.ttl)
+            pipe.ltrim(corr_key, 0, 100)  # Keep max 100 logs per correlation ID
+        for level_key in level_keys:
+            pipe.expire(level_key, self.ttl)
+            pipe.ltrim(level_key, 0, self.max_recent_logs - 1)
         
-        # Add to correlation ID index
-        if correlation_id != 'none':
-            corr_key = f"logs:correlation:{correlation_id}"
-            self.redis_client.lpush(corr_key, log_key)
-            self.redis_client.expire(corr_key, self.ttl)
-            self.redis_client.ltrim(corr_key, 0, 100)  # Keep max 100 logs per correlation ID
+        pipe.execute()
 
 
 # Global Redis processor instance
 redis_log_processor = None
 
+# Configuration is a process-wide constant once set up
+_configured = False
+_configure_lock = threading.Lock()
 
-def setup_logging() -> None:
-    """Configure structured logging for the application."""
-    global redis_log_processor
-    
-    # Set up stdlib logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, settings.log_level.upper()),
-    )
-    
-    # Initialize Redis processor
-    try:
-        redis_log_processor = RedisLogProcessor()
-    except Exception as e:
-        print(f"Warning: Could not initialize Redis logging: {e}")
-        redis_log_processor = None
-    
-    # Build processor list
-    processors = [
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.CallsiteParameterAdder(
-            parameters=[
-                structlog.processors.CallsiteParameter.FILENAME,
-                structlog.processors.CallsiteParameter.FUNC_NAME,
-                structlog.processors.CallsiteParameter.LINENO,
-            ]
-        ),
-        structlog.processors.dict_tracebacks,
-    ]
-    
-    # Add Redis processor if available
-    if redis_log_processor:
-        processors.append(redis_log_processor)
-    
-    # Add final renderer
-    processors.append(
-        structlog.processors.JSONRenderer() if settings.environment == "production" 
-        else structlog.dev.ConsoleRenderer(colors=True)
-    )
+# Processors that run ahead of the Redis processor and the renderer
+_BASE_PROCESSORS = (
+    structlog.stdlib.filter_by_level,
+    structlog.stdlib.add_logger_name,
+    structlog.stdlib.add_log_level,
+    structlog.stdlib.PositionalArgumentsFormatter(),
+    structlog.processors.TimeStamper(fmt="iso"),
+    structlog.processors.StackInfoRenderer(),
+    structlog.processors.format_exc_info,
+    structlog.processors.UnicodeDecoder(),
+    structlog.processors.CallsiteParameterAdder(
+        parameters=[
+            structlog.processors.CallsiteParameter.FILENAME,
+            structlog.processors.CallsiteParameter.FUNC_NAME,
+            structlog.processors.CallsiteParameter.LINENO,
+        ]
+    ),
+    structlog.processors.dict_tracebacks,
+)
+
+
+def setup_logging(force: bool = False) -> None:
+    """Configure structured logging for the application, once unless forced."""
+    global redis_log_processor, _configured
     
-    # Configure structlog
-    structlog.configure(
-        processors=processors,
-        context_class=dict,
-        logger_factory=structlog.stdlib.LoggerFactory(),
-        cache_logger_on_first_use=True,
-    )
+    with _configure_lock:
+        if _configured and not force:
+            return
+        
+        # Drop loggers handed out under the previous configuration
+        get_logger.cache_clear()
+        
+        # Set up stdlib logging
+        logging.basicConfig(
+            format="%(message)s",
+            stream=sys.stdout,
+            level=getattr(logging, settings.log_level.upper()),
+        )
+        
+        # Initialize Redis processor; a forced reconfigure keeps the running one so
+        # there is only ever one drain thread and one exit flush
+        if redis_log_processor is None:
+            try:
+                redis_log_processor = RedisLogProcessor()
+                redis_log_processor.start()
+            except Exception as e:
+                print(f"Warning: Could not initialize Redis logging: {e}")
+                redis_log_processor = None
+        
+        # Build processor list
+        processors = list(_BASE_PROCESSORS)
+        
+        # Add Redis processor if available
+        if redis_log_processor:
+            processors.append(redis_log_processor)
+        
+        # Add final renderer
+        processors.append(
+            _orjson_renderer if settings.environment == "production" 
+            else structlog.dev.ConsoleRenderer(colors=True)
+        )
+        
+        # Configure structlog
+        structlog.configure(
+            processors=processors,
+            context_class=dict,
+            logger_factory=structlog.stdlib.LoggerFactory(),
+            cache_logger_on_first_use=True,
+        )
+        _configured = True
 
 
+@functools.lru_cache(maxsize=256)
 def get_logger(name: str) -> structlog.BoundLogger:
     """Get a configured logger instance."""
     return structlog.get_logger(name)
@@ -1,7 +1,9 @@
 from prometheus_client import Counter, Histogram, Gauge, generate_latest
 from typing import Dict, Any
+import re
 import time
-from functools import wraps
+from functools import lru_cache, wraps
+from src.config import settings
 
 
 # Define metrics
@@ -56,17 +58,77 @@ error_count = Counter(
     ['error_type', 'endpoint']
 )
 
+logs_dropped_count = Counter(
+    'rag_logs_dropped_total',
+    'Total number of log events dropped before reaching Redis'
+)
+
+
+# Numeric, hex and UUID path segments collapse to a single label value
+_PATH_ID_RE = re.compile(r"/(?:\d+|[0-9a-fA-F-]{8,})(?=/|$)")
+_MAX_ENDPOINT_LENGTH = 64
+# Mirrors the values of SUPPORTED_FORMATS in src.processing.validation, which
+# cannot be imported here without a cycle through the logger
+_ALLOWED_DOC_TYPES = frozenset({"pdf", "txt", "json"})
+
+
+def _normalize_endpoint(endpoint: str) -> str:
+    """Bound the cardinality of the endpoint label."""
+    if settings.aggregate_metrics:
+        return "all"
+    return _PATH_ID_RE.sub("/:id", endpoint)[:_MAX_ENDPOINT_LENGTH]
+
+
+def _normalize_doc_type(doc_type: str) -> str:
+    """Bound the cardinality of the document_type label."""
+    doc_type = (doc_type or "").lower().lstrip(".")
+    return doc_type if doc_type in _ALLOWED_DOC_TYPES else "other"
+
+
+# Labelled children are cached so the hot path skips the label lookup. The cache
+# does not limit series: prometheus_client keeps every child it creates, and label
+# cardinality is bounded by _normalize_endpoint and _ALLOWED_DOC_TYPES instead
+@lru_cache(maxsize=4096)
+def _request_count_child(method: str, endpoint: str, status_code: int):
+    return request_count.labels(method=method, endpoint=endpoint, status=status_code)
+
+
+@lru_cache(maxsize=4096)
+def _request_duration_child(method: str, endpoint: str):
+    return request_duration.labels(method=method, endpoint=endpoint)
+
+
+@lru_cache(maxsize=64)
+def _document_count_child(status: str):
+    return document_processing_count.labels(status=status)
+
+
+@lru_cache(maxsize=64)
+def _document_duration_child(doc_type: str):
+    return document_processing_duration.labels(document_type=doc_type)
+
+
+@lru_cache(maxsize=64)
+def _vector_search_child(search_type: str):
+    return vector_search_duration.labels(search_type=search_type)
+
+
+@lru_cache(maxsize=4096)
+def _error_count_child(error_type: str, endpoint: str):
+    return error_count.labels(error_type=error_type, endpoint=endpoint)
+
 
 def track_request(method: str, endpoint: str, status_code: int, duration: float):
     """Track API request metrics."""
-    request_count.labels(method=method, endpoint=endpoint, status=status_code).inc()
-    request_duration.labels(method=method, endpoint=endpoint).observe(duration)
+    endpoint = _normalize_endpoint(endpoint)
+    _request_count_child(method, endpoint, status_code).inc()
+    _request_duration_child(method, endpoint).observe(duration)
 
 
 def track_document_processing(status: str, duration: float, doc_type: str):
     """Track document processing metrics."""
-    document_processing_count.labels(status=status).inc()
-    document_processing_duration.labels(document_type=doc_type).observe(duration)
+    _document_count_child(status).inc()
+    _document_duration_child(_normalize_doc_type(doc_type)).observe(duration)
 
 
 def track_embedding_generation(duration: float):
@@ -76,12 +138,17 @@ def track_embedding_generation(duration: float):
 
 def track_vector_search(search_type: str, duration: float):
     """Track vector search metrics."""
-    vector_search_duration.labels(search_type=search_type).observe(duration)
+    _vector_search_child(search_type).observe(duration)
 
 
 def track_error(error_type: str, endpoint: str):
     """Track error metrics."""
-    error_count.labels(error_type=error_type, endpoint=endpoint).inc()
+    _error_count_child(error_type, _normalize_endpoint(endpoint)).inc()
+
+
+def track_dropped_log():
+    """Track a log event dropped because the Redis log queue was full."""
+    logs_dropped_count.inc()
 
 
 def measure_time(metric_func):
@@ -89,27 +156,27 @@ def measure_time(metric_func):
     def decorator(func):
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = time.perf_counter()
             try:
                 result = await func(*args, **kwargs)
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
                 metric_func(duration=duration)
                 return result
             except Exception as e:
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
                 metric_func(duration=duration)
                 raise
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = time.perf_counter()
             try:
                 result = func(*args, **kwargs)
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
                 metric_func(duration=duration)
                 return result
             except Exception as e:
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
                 metric_func(duration=duration)
                 raise
         
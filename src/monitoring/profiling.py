@@ -2,19 +2,38 @@
 Profiling utilities for analyzing performance from logs.
 """
 from typing import Dict, List, Any, Optional
-from datetime import datetime
-from collections import defaultdict
-import statistics
+from datetime import datetime, timezone
+from collections import defaultdict, deque
+import functools
+import heapq
+import re
+import numpy as np
+
+try:
+    from ciso8601 import parse_datetime as _parse_datetime
+except ImportError:
+    _parse_datetime = None
+
+# Phase boundary events look like "<phase>_started" / "<phase>_completed"
+_PHASE_RE = re.compile(r"^(?P<phase>.+)_(?P<kind>started|completed)$")
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_iso(timestamp_str: str) -> datetime:
+    if _parse_datetime is not None:
+        parsed = _parse_datetime(timestamp_str)
+    else:
+        parsed = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+    # Timestamps without an offset are UTC, as stamped by structlog
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
 
 
 def parse_timestamp(timestamp_str: str) -> datetime:
     """Parse ISO format timestamp."""
     try:
-        # Handle both formats with and without microseconds
-        if '.' in timestamp_str:
-            return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-        else:
-            return datetime.fromisoformat(timestamp_str.replace('Z', '') + '+00:00')
+        return _parse_iso(timestamp_str)
     except:
         return datetime.now()
 
@@ -24,17 +43,19 @@ def analyze_request_logs(logs: List[Dict[str, Any]]) -> Dict[str, Any]:
     if not logs:
         return {}
     
-    # Sort logs by timestamp
-    sorted_logs = sorted(logs, key=lambda x: parse_timestamp(x.get('timestamp', '')))
+    # Parse each timestamp once, then sort logs by it
+    timed_logs = sorted(
+        ((parse_timestamp(log.get('timestamp', '')), log) for log in logs),
+        key=lambda pair: pair[0]
+    )
     
     # Find request start and end
     request_start = None
     request_end = None
     phases = {}
     
-    for log in sorted_logs:
+    for timestamp, log in timed_logs:
         event = log.get('event', '')
-        timestamp = parse_timestamp(log.get('timestamp', ''))
         
         if event == 'request_started':
             request_start = timestamp
@@ -42,12 +63,12 @@ def analyze_request_logs(logs: List[Dict[str, Any]]) -> Dict[str, Any]:
             request_end = timestamp
         
         # Track phase starts and ends
-        if event.endswith('_started'):
-            phase_name = event.replace('_started', '')
-            phases[phase_name] = {'start': timestamp}
-        elif event.endswith('_completed'):
-            phase_name = event.replace('_completed', '')
-            if phase_name in phases:
+        match = _PHASE_RE.match(event)
+        if match:
+            phase_name = match['phase']
+            if match['kind'] == 'started':
+                phases[phase_name] = {'start': timestamp}
+            elif phase_name in phases:
                 phases[phase_name]['end'] = timestamp
     
     # Calculate phase durations
@@ -72,91 +93,119 @@ def analyze_request_logs(logs: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
-def aggregate_performance_stats(all_logs: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Aggregate performance statistics from multiple requests."""
-    # Group logs by correlation ID
-    requests_by_correlation = defaultdict(list)
+def _summarize(durations: List[float]) -> Dict[str, float]:
+    """Compute summary statistics for a list of durations."""
+    values = np.fromiter(durations, dtype=np.float64, count=len(durations))
+    p50, p95 = np.quantile(values, [0.5, 0.95])
+    return {
+        'avg': float(values.mean()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'count': int(values.size)
+    }
+
+
+def _timed_request_logs(all_logs: List[Dict[str, Any]]):
+    """Yield (timestamp, log) for request-scoped logs with a parseable timestamp."""
     for log in all_logs:
         corr_id = log.get('correlation_id')
-        if corr_id and corr_id != 'none':
-            requests_by_correlation[corr_id].append(log)
+        if not corr_id or corr_id == 'none':
+            continue
+        try:
+            yield _parse_iso(log.get('timestamp', '')), log
+        except Exception:
+            continue
+
+
+def aggregate_performance_stats(all_logs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate performance statistics from multiple requests."""
+    # Stream events in time order; only in-flight requests are held in memory
+    timed_logs = sorted(_timed_request_logs(all_logs), key=lambda pair: pair[0])
     
-    # Analyze each request
-    request_analyses = []
-    for corr_id, logs in requests_by_correlation.items():
-        analysis = analyze_request_logs(logs)
-        if analysis.get('total_duration'):
-            request_analyses.append(analysis)
+    in_flight = {}
+    recent_requests = deque(maxlen=10)
+    total_requests = 0
+    phase_durations_all = defaultdict(list)
+    total_durations = []
     
-    if not request_analyses:
+    for timestamp, log in timed_logs:
+        corr_id = log['correlation_id']
+        state = in_flight.get(corr_id)
+        if state is None:
+            state = in_flight[corr_id] = {'starts': {}, 'durations': {}, 'log_count': 0}
+        state['log_count'] += 1
+        
+        match = _PHASE_RE.match(log.get('event', ''))
+        if not match:
+            continue
+        phase = match['phase']
+        if match['kind'] == 'started':
+            state['starts'][phase] = timestamp
+            continue
+        if phase not in state['starts']:
+            continue
+        
+        duration = (timestamp - state['starts'][phase]).total_seconds()
+        state['durations'][phase] = duration
+        if phase != 'request':
+            continue
+        
+        # Request finished: fold its durations into the buckets and drop its state
+        del in_flight[corr_id]
+        if not duration:
+            continue
+        total_requests += 1
+        total_durations.append(duration)
+        for name, phase_duration in state['durations'].items():
+            phase_durations_all[name].append(phase_duration)
+        recent_requests.append({
+            'correlation_id': corr_id,
+            'total_duration': duration,
+            'phase_durations': state['durations'],
+            'start_time': state['starts']['request'],
+            'end_time': timestamp,
+            'log_count': state['log_count']
+        })
+    
+    if not total_requests:
         return {
             'total_requests': 0,
             'phase_stats': {},
             'duration_stats': {}
         }
     
-    # Aggregate phase statistics
-    phase_durations_all = defaultdict(list)
-    total_durations = []
-    
-    for analysis in request_analyses:
-        if analysis['total_duration']:
-            total_durations.append(analysis['total_duration'])
-        
-        for phase, duration in analysis.get('phase_durations', {}).items():
-            phase_durations_all[phase].append(duration)
-    
-    # Calculate statistics for each phase
-    phase_stats = {}
-    for phase, durations in phase_durations_all.items():
-        if durations:
-            phase_stats[phase] = {
-                'avg': statistics.mean(durations),
-                'min': min(durations),
-                'max': max(durations),
-                'p50': statistics.median(durations),
-                'p95': statistics.quantiles(durations, n=20)[18] if len(durations) > 1 else durations[0],
-                'count': len(durations)
-            }
-    
-    # Calculate overall statistics
-    duration_stats = {}
-    if total_durations:
-        duration_stats = {
-            'avg': statistics.mean(total_durations),
-            'min': min(total_durations),
-            'max': max(total_durations),
-            'p50': statistics.median(total_durations),
-            'p95': statistics.quantiles(total_durations, n=20)[18] if len(total_durations) > 1 else total_durations[0],
-            'count': len(total_durations)
-        }
+    phase_stats = {
+        phase: _summarize(durations)
+        for phase, durations in phase_durations_all.items()
+    }
+    duration_stats = _summarize(total_durations)
     
     return {
-        'total_requests': len(request_analyses),
+        'total_requests': total_requests,
         'phase_stats': phase_stats,
         'duration_stats': duration_stats,
-        'recent_requests': request_analyses[-10:]  # Last 10 requests
+        'recent_requests': list(recent_requests)  # Last 10 completed requests
     }
 
 
-def identify_bottlenecks(phase_stats: Dict[str, Dict[str, float]]) -> List[Dict[str, Any]]:
-    """Identify performance bottlenecks from phase statistics."""
-    bottlenecks = []
-    
+def identify_bottlenecks(phase_stats: Dict[str, Dict[str, float]], top_n: int = 10) -> List[Dict[str, Any]]:
+    """Identify the top_n slowest phases from phase statistics."""
     # Calculate total average time
     total_avg = sum(stats['avg'] for stats in phase_stats.values())
     
-    for phase, stats in phase_stats.items():
-        percentage = (stats['avg'] / total_avg * 100) if total_avg > 0 else 0
-        
+    # Only the slowest phases are reported, so skip the full sort
+    slowest = heapq.nlargest(top_n, phase_stats.items(), key=lambda item: item[1]['avg'])
+    
+    bottlenecks = []
+    for phase, stats in slowest:
+        avg = stats['avg']
         bottlenecks.append({
             'phase': phase,
-            'avg_duration': stats['avg'],
-            'percentage': percentage,
+            'avg_duration': avg,
+            'percentage': (avg / total_avg * 100) if total_avg > 0 else 0,
             'max_duration': stats['max']
         })
     
-    # Sort by average duration descending
-    bottlenecks.sort(key=lambda x: x['avg_duration'], reverse=True)
-    
-    return bottlenecks
\ No newline at end of file
+    return bottlenecks
@@ -1,7 +1,16 @@
 from typing import List, Dict, Any, Union
+from collections import OrderedDict
+import hashlib
 import numpy as np
-from tenacity import retry, stop_after_attempt, wait_exponential
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 import asyncio
+import weakref
 from concurrent.futures import ThreadPoolExecutor
 from src.config import settings
 from src.monitoring.logger import get_logger
@@ -10,6 +19,28 @@ import time
 
 logger = get_logger(__name__)
 
+OPENAI_EMBEDDINGS_URL = "https://api.openai.com/v1/embeddings"
+
+# Rate limits, server errors and network failures are worth another attempt
+RETRYABLE_ERRORS = (httpx.HTTPStatusError, httpx.TransportError)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 5
+MAX_RETRY_WAIT = 20
+
+_backoff = wait_exponential_jitter(initial=1, max=MAX_RETRY_WAIT)
+
+
+def _wait_for_retry(retry_state) -> float:
+    """Honor the server's Retry-After header (capped), else back off with jitter."""
+    error = retry_state.outcome.exception()
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_WAIT)
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
 
 class EmbeddingGenerator:
     """Generate embeddings for text chunks."""
@@ -19,6 +50,26 @@ class EmbeddingGenerator:
         self.batch_size = settings.batch_size
         self._model = None
         self._executor = ThreadPoolExecutor(max_workers=4)
+        # httpx clients are bound to the loop that opened their connections, and the
+        # agent's sync tool wrappers run on loops of their own
+        self._http_clients = weakref.WeakKeyDictionary()
+        self._cache = EmbeddingCache(max_size=settings.embedding_cache_size)
+    
+    @property
+    def http_client(self):
+        """HTTP/2 client for the running loop, so its concurrent batches multiplex on one connection."""
+        loop = asyncio.get_running_loop()
+        client = self._http_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(timeout=60.0, http2=True)
+            self._http_clients[loop] = client
+        return client
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client of the running loop."""
+        client = self._http_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
     
     @property
     def model(self):
@@ -41,10 +92,6 @@ class EmbeddingGenerator:
         
         return self._model
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
     async def generate_embeddings(
         self, 
         texts: List[str], 
@@ -57,11 +104,28 @@ class EmbeddingGenerator:
             if not texts:
                 return []
             
-            # Generate embeddings based on model type
-            if self._model == "openai" or self.model == "openai":
-                embeddings = await self._generate_openai_embeddings(texts)
-            else:
-                embeddings = await self._generate_sentence_transformer_embeddings(texts)
+            # Only embed texts that are not cached, each distinct text once
+            cached = [self._cache.get(text, self.model_name) for text in texts]
+            missing = list(dict.fromkeys(
+                text for text, embedding in zip(texts, cached) if embedding is None
+            ))
+            
+            fresh = {}
+            if missing:
+                # Generate embeddings based on model type
+                if self._model == "openai" or self.model == "openai":
+                    new_embeddings = await self._generate_openai_embeddings(missing)
+                else:
+                    new_embeddings = await self._generate_sentence_transformer_embeddings(missing)
+                
+                for text, embedding in zip(missing, new_embeddings):
+                    fresh[text] = np.asarray(embedding, dtype=np.float32)
+                    self._cache.set(text, fresh[text], self.model_name)
+            
+            embeddings = [
+                (embedding if embedding is not None else fresh[text]).tolist()
+                for text, embedding in zip(texts, cached)
+            ]
             
             # Combine with metadata
             results = []
@@ -79,6 +143,7 @@ class EmbeddingGenerator:
             logger.info(
                 "embeddings_generated",
                 count=len(results),
+                cache_hits=len(texts) - len(missing),
                 model=self.model_name,
                 duration=duration
             )
@@ -92,8 +157,6 @@ class EmbeddingGenerator:
     async def _generate_openai_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings using OpenAI API via direct HTTP requests."""
         try:
-            import httpx
-            
             embeddings = []
             
             # Prepare headers for OpenAI API
@@ -103,31 +166,11 @@ class EmbeddingGenerator:
             }
             
             # Process in batches
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                for i in range(0, len(texts), self.batch_size):
-                    batch = texts[i:i + self.batch_size]
-                    
-                    # Prepare request data
-                    data = {
-                        "model": self.model_name,
-                        "input": batch
-                    }
-                    
-                    # Make direct HTTP request to OpenAI API
-                    response = await client.post(
-                        "https://api.openai.com/v1/embeddings",
-                        headers=headers,
-                        json=data
-                    )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        batch_embeddings = [item["embedding"] for item in result["data"]]
-                        embeddings.extend(batch_embeddings)
-                    else:
-                        error_msg = f"OpenAI API error: HTTP {response.status_code} - {response.text}"
-                        logger.error("openai_api_error", error=error_msg)
-                        raise Exception(error_msg)
+            client = self.http_client
+            for i in range(0, len(texts), self.batch_size):
+                batch = texts[i:i + self.batch_size]
+                
+                embeddings.extend(await self._request_embeddings(client, headers, batch))
             
             return embeddings
             
@@ -135,6 +178,52 @@ class EmbeddingGenerator:
             logger.error("openai_embedding_failed", error=str(e))
             raise
     
+    async def _request_embeddings(
+        self,
+        client: httpx.AsyncClient,
+        headers: Dict[str, str],
+        batch: List[str]
+    ) -> List[List[float]]:
+        """Embed one batch, retrying transient failures without blocking the loop."""
+        # Prepare request data
+        data = {
+            "model": self.model_name,
+            "input": batch
+        }
+        
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(MAX_ATTEMPTS),
+            wait=_wait_for_retry,
+            retry=retry_if_exception_type(RETRYABLE_ERRORS),
+            sleep=asyncio.sleep,
+            reraise=True
+        ):
+            with attempt:
+                # Make direct HTTP request to OpenAI API
+                response = await client.post(
+                    OPENAI_EMBEDDINGS_URL,
+                    headers=headers,
+                    json=data
+                )
+                
+                if response.status_code == 200:
+                    result = response.json()
+                    return [item["embedding"] for item in result["data"]]
+                
+                error_msg = f"OpenAI API error: HTTP {response.status_code} - {response.text}"
+                logger.error(
+                    "openai_api_error",
+                    error=error_msg,
+                    attempt=attempt.retry_state.attempt_number
+                )
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    raise httpx.HTTPStatusError(
+                        error_msg,
+                        request=response.request,
+                        response=response
+                    )
+                raise Exception(error_msg)
+    
     async def _generate_sentence_transformer_embeddings(
         self, 
         texts: List[str]
@@ -169,25 +258,33 @@ class EmbeddingGenerator:
 
 
 class EmbeddingCache:
-    """Simple in-memory cache for embeddings."""
+    """Simple in-memory LRU cache for embeddings."""
     
     def __init__(self, max_size: int = 1000):
-        self.cache: Dict[str, List[float]] = {}
+        self.cache: OrderedDict[str, np.ndarray] = OrderedDict()
         self.max_size = max_size
     
-    def get(self, text: str) -> Union[List[float], None]:
+    def get(self, text: str, model: str = "") -> Union[np.ndarray, None]:
         """Get embedding from cache."""
-        return self.cache.get(self._hash_text(text))
+        key = self._hash_text(text, model)
+        embedding = self.cache.get(key)
+        if embedding is not None:
+            self.cache.move_to_end(key)
+        return embedding
     
-    def set(self, text: str, embedding: List[float]) -> None:
+    def set(self, text: str, embedding: np.ndarray, model: str = "") -> None:
         """Store embedding in cache."""
-        if len(self.cache) >= self.max_size:
-            # Remove oldest entry (simple FIFO)
-            self.cache.pop(next(iter(self.cache)))
+        if self.max_size <= 0:
+            return
+        
+        key = self._hash_text(text, model)
+        self.cache[key] = embedding
+        self.cache.move_to_end(key)
         
-        self.cache[self._hash_text(text)] = embedding
+        if len(self.cache) > self.max_size:
+            # Remove least recently used entry
+            self.cache.popitem(last=False)
     
-    def _hash_text(self, text: str) -> str:
-        """Create a hash of text for cache key."""
-        import hashlib
-        return hashlib.md5(text.encode()).hexdigest()
\ No newline at end of file
+    def _hash_text(self, text: str, model: str = "") -> str:
+        """Create a hash of model name and text for cache key."""
+        return hashlib.sha256(f"{model}:{text}".encode()).hexdigest()
@@ -3,6 +3,7 @@ LangChain ReAct Agent for intelligent query processing.
 Uses LangChain's ReAct agent to decide whether to search for context or answer directly.
 """
 
+import asyncio
 from typing import List, Dict, Any, Optional
 from langchain.agents import AgentType, initialize_agent
 from langchain.tools import Tool
@@ -16,6 +17,16 @@ from src.processing.redis_memory import get_conversation_memory
 logger = get_logger(__name__)
 
 
+def _run_sync(tool_coroutine, query: str) -> str:
+    """Run an async tool from LangChain's synchronous path."""
+    try:
+        loop = asyncio.get_event_loop()
+        return loop.run_until_complete(tool_coroutine(query))
+    except RuntimeError:
+        # If no event loop is running, create a new one
+        return asyncio.run(tool_coroutine(query))
+
+
 class DocumentSearchTool:
     """Tool for searching documents in the RAG system."""
     
@@ -175,6 +186,31 @@ class LangChainReActAgent:
             )
         ]
     
+    async def _search_documents(self, query: str) -> str:
+        """Search with the current query's tool; the agent's tools outlive a single query."""
+        return await self.doc_search_tool.search(query)
+    
+    async def _get_system_info(self, query: str) -> str:
+        """Get system info with the current query's tool."""
+        return await self.system_info_tool.get_info(query)
+    
+    def _agent_tools(self) -> List[Tool]:
+        """Tools for the persistent agent, run natively on the request's event loop."""
+        return [
+            Tool(
+                name="search_documents",
+                description="Search through uploaded documents for relevant information. Use this when you need to find specific information from the knowledge base.",
+                func=lambda q: _run_sync(self._search_documents, q),
+                coroutine=self._search_documents
+            ),
+            Tool(
+                name="get_system_info", 
+                description="Get information about the RAG system, such as document count or list of available documents.",
+                func=lambda q: _run_sync(self._get_system_info, q),
+                coroutine=self._get_system_info
+            )
+        ]
+    
     async def process_query(self, query: str, search_function, search_params, vector_store, embedding_generator, session_id: str = "default"):
         """Process query using LangChain ReAct agent with custom LLM."""
         try:
@@ -193,39 +229,7 @@ class LangChainReActAgent:
             
             # Initialize agent only once, but update memory for each session
             if self.agent is None:
-                # Create sync wrapper functions for async tools
-                def sync_search_documents(query: str) -> str:
-                    """Synchronous wrapper for async document search."""
-                    import asyncio
-                    try:
-                        loop = asyncio.get_event_loop()
-                        return loop.run_until_complete(self.doc_search_tool.search(query))
-                    except RuntimeError:
-                        # If no event loop is running, create a new one
-                        return asyncio.run(self.doc_search_tool.search(query))
-                
-                def sync_get_system_info(query: str) -> str:
-                    """Synchronous wrapper for async system info."""
-                    import asyncio
-                    try:
-                        loop = asyncio.get_event_loop()
-                        return loop.run_until_complete(self.system_info_tool.get_info(query))
-                    except RuntimeError:
-                        # If no event loop is running, create a new one
-                        return asyncio.run(self.system_info_tool.get_info(query))
-                
-                tools = [
-                    Tool(
-                        name="search_documents",
-                        description="Search through uploaded documents for relevant information. Use this when you need to find specific information from the knowledge base.",
-                        func=sync_search_documents
-                    ),
-                    Tool(
-                        name="get_system_info", 
-                        description="Get information about the RAG system, such as document count or list of available documents.",
-                        func=sync_get_system_info
-                    )
-                ]
+                tools = self._agent_tools()
                 
                 # Custom system message for the agent
                 system_message = f"""You are a helpful AI assistant with access to a document knowledge base.
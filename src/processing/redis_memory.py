@@ -6,10 +6,10 @@ that persists chat history across stateless API requests using LangChain's
 official RedisChatMessageHistory with fallback to custom implementation.
 """
 
-import json
 import os
-from typing import List, Optional
+from typing import List, Optional, Union
 
+import orjson
 import redis
 from langchain.memory import ConversationBufferMemory
 from langchain_core.chat_history import BaseChatMessageHistory
@@ -62,17 +62,17 @@ class RedisBackedChatHistory(BaseChatMessageHistory):
             logger.warning(f"Failed to connect to Redis: {e}")
             return None
     
-    def _serialize_message(self, message: BaseMessage) -> str:
+    def _serialize_message(self, message: BaseMessage) -> bytes:
         """Serialize a message to JSON."""
-        return json.dumps({
+        return orjson.dumps({
             "type": message.__class__.__name__,
             "content": message.content
         })
     
-    def _deserialize_message(self, data: str) -> BaseMessage:
-        """Deserialize a message from JSON."""
+    def _deserialize_message(self, data: Union[str, bytes]) -> BaseMessage:
+        """Deserialize a message from JSON, as str or raw Redis bytes."""
         try:
-            msg_data = json.loads(data)
+            msg_data = orjson.loads(data)
             msg_type = msg_data["type"]
             content = msg_data["content"]
             
@@ -82,7 +82,9 @@ class RedisBackedChatHistory(BaseChatMessageHistory):
                 return AIMessage(content=content)
             else:
                 return HumanMessage(content=content)
-        except (json.JSONDecodeError, KeyError):
+        except (orjson.JSONDecodeError, KeyError):
+            if isinstance(data, bytes):
+                data = data.decode()
             return HumanMessage(content=data)
     
     @property
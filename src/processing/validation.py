@@ -1,5 +1,6 @@
 from typing import BinaryIO, Dict, Any, Optional
 import hashlib
+import io
 import mimetypes
 from pathlib import Path
 from src.monitoring.logger import get_logger
@@ -14,6 +15,7 @@ SUPPORTED_FORMATS = {
 }
 
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+HASH_CHUNK_SIZE = 64 * 1024  # Bytes read per hash update
 
 
 class DocumentValidator:
@@ -62,10 +64,18 @@ class DocumentValidator:
     @staticmethod
     def calculate_hash(file: BinaryIO) -> str:
         """Calculate SHA-256 hash of file content."""
+        # In-memory files are hashed in one call over their buffer, no copies
+        if isinstance(file, io.BytesIO):
+            start = file.tell()
+            with file.getbuffer() as buffer:
+                file_hash = hashlib.sha256(buffer[start:]).hexdigest()
+            file.seek(0, 2)
+            return file_hash
+        
         sha256_hash = hashlib.sha256()
         
-        # Read file in chunks
-        for chunk in iter(lambda: file.read(4096), b""):
+        # Read file in chunks so memory stays bounded for large uploads
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
             sha256_hash.update(chunk)
         
         return sha256_hash.hexdigest()
@@ -1,11 +1,28 @@
-from typing import List, Dict, Any, Optional, Tuple
-from qdrant_client import QdrantClient
+from typing import ClassVar, List, Dict, Any, Optional, Set, Tuple
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
 from qdrant_client.models import (
-    Distance, VectorParams, PointStruct, 
-    Filter, FieldCondition, MatchValue
+    Batch, Distance, VectorParams, 
+    Filter, FilterSelector, FieldCondition, MatchAny, MatchValue, OptimizersConfigDiff, PayloadSelectorInclude,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType
 )
+import asyncio
+import hashlib
+import heapq
 import uuid
+import weakref
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+import grpc
+import numpy as np
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 from src.config import settings
 from src.monitoring.logger import get_logger
 from src.monitoring.metrics import track_vector_search, vector_db_size
@@ -13,41 +30,191 @@ import time
 
 logger = get_logger(__name__)
 
+UPSERT_BATCH_SIZE = 500  # Points sent per upsert request
+PARALLEL_UPLOAD_THRESHOLD = 1000  # Smaller loads don't repay starting worker processes
+UPLOAD_PARALLELISM = 4
+DEFAULT_INDEXING_THRESHOLD = 20000  # Qdrant's default, restored after bulk loads
+
+# int8 copies of the vectors kept in RAM for search; full vectors stay on disk for rescoring
+QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+)
+
+# Search retries transient failures: dropped connections, gateway errors, gRPC unavailability
+SEARCH_ATTEMPTS = 3
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+RETRYABLE_GRPC_CODES = {grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED}
+
+# Payload fields indexed for filtering, with their index types
+PAYLOAD_INDEXES = [
+    ("document_id", "keyword"),
+    ("document_type", "keyword"),
+    ("timestamp", "integer"),
+    ("chunk_id", "integer"),
+]
+
+# Payload fields list_documents reads; chunk text is never transferred for a listing
+LISTING_PAYLOAD_FIELDS = ["document_id", "document_type", "filename", "timestamp"]
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Whether a Qdrant client error is worth another attempt."""
+    if isinstance(error, ResponseHandlingException):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, grpc.aio.AioRpcError):
+        return error.code() in RETRYABLE_GRPC_CODES
+    return False
+
+
+def _point_id(document_id: Optional[str], chunk_id: Optional[int]) -> str:
+    """Stable point ID for a document's chunk, so re-ingesting it overwrites in place."""
+    if document_id is None or chunk_id is None:
+        # Nothing identifies the chunk across ingests
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(uuid.NAMESPACE_OID, f"{document_id}:{chunk_id}"))
+
+
+@lru_cache(maxsize=256)
+def _build_filter(filter_items: frozenset) -> Optional[Filter]:
+    """Build a must-match Filter once per distinct set of field values."""
+    conditions = [
+        FieldCondition(key=field, match=MatchValue(value=value))
+        for field, value in filter_items
+        if value is not None
+    ]
+    return Filter(must=conditions) if conditions else None
+
+
+class SearchResultCache:
+    """In-memory LRU cache of formatted search results with a time to live."""
+    
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.cache: OrderedDict[bytes, Tuple[float, List[Dict[str, Any]]]] = OrderedDict()
+        self.max_size = max_size
+        self.ttl = ttl
+    
+    def get(self, key: bytes) -> Optional[List[Dict[str, Any]]]:
+        """Get copies of cached results, or None when missing or expired."""
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        expires_at, results = entry
+        if expires_at < time.monotonic():
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        # Callers such as hybrid_search rescore results in place
+        return [{**r, "metadata": dict(r["metadata"])} for r in results]
+    
+    def set(self, key: bytes, results: List[Dict[str, Any]]) -> None:
+        """Store copies of results."""
+        if self.max_size <= 0:
+            return
+        
+        self.cache[key] = (
+            time.monotonic() + self.ttl,
+            [{**r, "metadata": dict(r["metadata"])} for r in results]
+        )
+        self.cache.move_to_end(key)
+        
+        if len(self.cache) > self.max_size:
+            # Remove least recently used entry
+            self.cache.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every entry, after writes change what a search would return."""
+        self.cache.clear()
+    
+    @staticmethod
+    def make_key(query_embedding, limit, filters, similarity_threshold) -> bytes:
+        """Digest of the query vector and search parameters."""
+        digest = hashlib.blake2b(
+            np.asarray(query_embedding, dtype=np.float32).tobytes(), digest_size=16
+        )
+        params = (limit, similarity_threshold, sorted((filters or {}).items(), key=repr))
+        digest.update(repr(params).encode())
+        return digest.digest()
+
 
 class VectorStore:
     """Qdrant vector database interface."""
     
+    # (url, collection, dimension) already checked by this process
+    _verified_collections: ClassVar[Set[Tuple[str, str, int]]] = set()
+    
     def __init__(self):
         try:
             logger.info(f"Initializing Qdrant client with URL: {settings.qdrant_url}")
+            self._client_kwargs = {
+                "url": settings.qdrant_url,
+                "prefer_grpc": settings.qdrant_prefer_grpc,
+                "grpc_port": settings.qdrant_grpc_port
+            }
             if settings.qdrant_api_key:
                 # Qdrant Cloud with API key
-                self.client = QdrantClient(
-                    url=settings.qdrant_url,
-                    api_key=settings.qdrant_api_key
-                )
-            else:
-                # Local Qdrant instance
-                self.client = QdrantClient(url=settings.qdrant_url)
+                self._client_kwargs["api_key"] = settings.qdrant_api_key
+            
+            # Async clients and locks are bound to the loop that first uses them, and the
+            # agent's sync tool wrappers run on loops of their own
+            self._clients = weakref.WeakKeyDictionary()
+            self._collection_locks = weakref.WeakKeyDictionary()
             
             self.collection_name = settings.qdrant_collection
-            logger.info(f"Qdrant client created, ensuring collection: {self.collection_name}")
-            self._ensure_collection()
+            self._search_cache = SearchResultCache(
+                max_size=settings.search_cache_size,
+                ttl=settings.search_cache_ttl
+            )
+            # The async client can't be awaited here, so collection setup runs on first use
+            self._collection_ready = False
             logger.info("VectorStore initialization completed successfully")
         except Exception as e:
             logger.error(f"VectorStore initialization failed: {str(e)}")
             raise
     
-    def _ensure_collection(self):
+    @property
+    def client(self) -> AsyncQdrantClient:
+        """Qdrant client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = AsyncQdrantClient(**self._client_kwargs)
+            self._clients[loop] = client
+        return client
+    
+    async def aclose(self) -> None:
+        """Close the Qdrant client of the running loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+    
+    async def _ensure_ready(self) -> None:
+        """Set up the collection once, before the first operation that needs it."""
+        if self._collection_ready:
+            return
+        loop = asyncio.get_running_loop()
+        lock = self._collection_locks.setdefault(loop, asyncio.Lock())
+        async with lock:
+            if not self._collection_ready:
+                # Later instances skip the collection and dimension round trips
+                key = (settings.qdrant_url, self.collection_name, settings.embedding_dimension)
+                if key not in VectorStore._verified_collections:
+                    logger.info(f"Ensuring collection: {self.collection_name}")
+                    await self._ensure_collection()
+                    VectorStore._verified_collections.add(key)
+                self._collection_ready = True
+    
+    async def _ensure_collection(self):
         """Ensure the collection exists with proper configuration."""
         try:
-            collections = self.client.get_collections().collections
+            collections = (await self.client.get_collections()).collections
             exists = any(c.name == self.collection_name for c in collections)
             
             if exists:
                 # Check if existing collection has correct dimension
                 try:
-                    collection_info = self.client.get_collection(self.collection_name)
+                    collection_info = await self.client.get_collection(self.collection_name)
                     # Handle different possible API response structures
                     if hasattr(collection_info.config, 'params'):
                         existing_dimension = collection_info.config.params.vectors.size
@@ -56,7 +223,7 @@ class VectorStore:
                     else:
                         # If we can't determine dimension, recreate to be safe
                         logger.warning(f"Cannot determine dimension of existing collection {self.collection_name}. Recreating.")
-                        self.client.delete_collection(self.collection_name)
+                        await self.client.delete_collection(self.collection_name)
                         exists = False
                         existing_dimension = None
                     
@@ -66,49 +233,22 @@ class VectorStore:
                             f"expected {settings.embedding_dimension}. Recreating collection."
                         )
                         # Delete and recreate collection
-                        self.client.delete_collection(self.collection_name)
+                        await self.client.delete_collection(self.collection_name)
                         exists = False
                     elif existing_dimension:
                         logger.info(f"Collection {self.collection_name} exists with correct dimension {existing_dimension}")
+                        # Collections created by older releases lack indexes added since
+                        await self._create_payload_indexes(existing=collection_info.payload_schema)
                 except Exception as e:
                     logger.error(f"Error checking collection dimension: {str(e)}. Recreating collection.")
                     try:
-                        self.client.delete_collection(self.collection_name)
+                        await self.client.delete_collection(self.collection_name)
                     except:
                         pass  # Collection might not exist or be accessible
                     exists = False
             
             if not exists:
-                logger.info(f"Creating collection {self.collection_name} with dimension {settings.embedding_dimension}")
-                
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=settings.embedding_dimension,
-                        distance=Distance.COSINE
-                    )
-                )
-                
-                # Create payload indices for filtering
-                self.client.create_payload_index(
-                    collection_name=self.collection_name,
-                    field_name="document_id",
-                    field_schema="keyword"
-                )
-                
-                self.client.create_payload_index(
-                    collection_name=self.collection_name,
-                    field_name="document_type",
-                    field_schema="keyword"
-                )
-                
-                self.client.create_payload_index(
-                    collection_name=self.collection_name,
-                    field_name="timestamp",
-                    field_schema="integer"
-                )
-                
-                logger.info("collection_created", collection=self.collection_name)
+                await self._create_collection()
             else:
                 logger.info("collection_exists", collection=self.collection_name)
                 
@@ -116,53 +256,153 @@ class VectorStore:
             logger.error("collection_setup_failed", error=str(e))
             raise
     
+    async def _create_collection(self) -> None:
+        """Create the collection and its payload indexes."""
+        logger.info(f"Creating collection {self.collection_name} with dimension {settings.embedding_dimension}")
+        
+        await self.client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(
+                size=settings.embedding_dimension,
+                distance=Distance.COSINE,
+                on_disk=True
+            ),
+            quantization_config=QUANTIZATION_CONFIG,
+            # Chunk text is read only for returned hits; filters use the payload indexes
+            on_disk_payload=True
+        )
+        
+        await self._create_payload_indexes()
+        
+        logger.info("collection_created", collection=self.collection_name)
+    
+    async def _create_payload_indexes(self, existing: Optional[Dict[str, Any]] = None) -> None:
+        """Create the payload indexes not already in existing, submitting them together."""
+        missing = [
+            (field_name, field_schema)
+            for field_name, field_schema in PAYLOAD_INDEXES
+            if field_name not in (existing or {})
+        ]
+        if existing is not None and missing:
+            logger.info("payload_indexes_added", fields=[field_name for field_name, _ in missing])
+        
+        await asyncio.gather(*[
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema
+            )
+            for field_name, field_schema in missing
+        ])
+    
+    async def recreate_collection(self) -> None:
+        """Drop the collection and create it empty with the configured dimension."""
+        # Delete existing collection if it exists
+        try:
+            collections = (await self.client.get_collections()).collections
+            if any(c.name == self.collection_name for c in collections):
+                logger.info(f"Deleting existing collection {self.collection_name}")
+                await self.client.delete_collection(self.collection_name)
+        except Exception as e:
+            logger.warning(f"Error deleting collection: {str(e)}")
+        
+        await self._create_collection()
+        
+        # Results cached from the dropped collection would otherwise outlive it
+        self._search_cache.clear()
+        self._collection_ready = True
+    
+    async def _set_indexing_threshold(self, threshold: int) -> None:
+        """Set the vector count above which segments get an HNSW index; 0 disables indexing."""
+        await self.client.update_collection(
+            collection_name=self.collection_name,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold)
+        )
+    
     async def upsert_documents(
         self, 
-        documents: List[Dict[str, Any]]
+        documents: List[Dict[str, Any]],
+        batch_size: int = UPSERT_BATCH_SIZE,
+        parallel: int = UPLOAD_PARALLELISM,
+        bulk_mode: bool = False
     ) -> List[str]:
-        """Insert or update documents with embeddings."""
+        """Insert or update documents with embeddings, uploading bulk loads in parallel."""
         if not documents:
             return []
+        await self._ensure_ready()
         
-        points = []
-        document_ids = []
+        # Fill pre-sized columns; one timestamp and one metadata lookup per chunk
+        n = len(documents)
+        ids = [None] * n
+        vectors = [None] * n
+        payloads = [None] * n
+        document_ids = [None] * n
+        timestamp = int(datetime.now().timestamp())
         
-        for doc in documents:
-            point_id = str(uuid.uuid4())
-            document_id = doc.get("metadata", {}).get("document_id", point_id)
+        for i, doc in enumerate(documents):
+            metadata = doc.get("metadata", {})
+            chunk_id = metadata.get("chunk_id", doc.get("chunk_id"))
+            point_id = _point_id(metadata.get("document_id"), chunk_id)
+            document_id = metadata.get("document_id", point_id)
             
             # Prepare payload
-            payload = {
+            payloads[i] = {
                 "text": doc["text"],
                 "document_id": document_id,
                 "chunk_id": doc.get("chunk_id", 0),
-                "document_type": doc.get("metadata", {}).get("document_type", "unknown"),
-                "timestamp": int(datetime.now().timestamp()),
-                **doc.get("metadata", {})
+                "document_type": metadata.get("document_type", "unknown"),
+                "timestamp": timestamp,
+                **metadata
             }
-            
-            point = PointStruct(
-                id=point_id,
-                vector=doc["embedding"],
-                payload=payload
-            )
-            
-            points.append(point)
-            document_ids.append(document_id)
+            ids[i] = point_id
+            vectors[i] = doc["embedding"]
+            document_ids[i] = document_id
         
-        # Batch upsert
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=points
-        )
+        if bulk_mode:
+            # Hold off HNSW indexing so it doesn't compete with the load
+            await self._set_indexing_threshold(0)
+        try:
+            if parallel > 1 and len(ids) >= PARALLEL_UPLOAD_THRESHOLD:
+                # Fan batches out over worker processes for bulk loads; the
+                # uploader is blocking, so keep it off the event loop
+                await asyncio.to_thread(
+                    self.client.upload_collection,
+                    collection_name=self.collection_name,
+                    # One contiguous float32 matrix: the uploader slices it natively and
+                    # pickles compact buffers to its workers instead of lists of floats
+                    vectors=np.asarray(vectors, dtype=np.float32),
+                    payload=payloads,
+                    ids=ids,
+                    batch_size=batch_size,
+                    parallel=parallel
+                )
+            else:
+                # Bounded batches sent concurrently; each is an independent request
+                # built from column slices rather than one PointStruct per chunk
+                await asyncio.gather(*[
+                    self.client.upsert(
+                        collection_name=self.collection_name,
+                        points=Batch(
+                            ids=ids[start:start + batch_size],
+                            vectors=vectors[start:start + batch_size],
+                            payloads=payloads[start:start + batch_size]
+                        )
+                    )
+                    for start in range(0, len(ids), batch_size)
+                ])
+        finally:
+            if bulk_mode:
+                await self._set_indexing_threshold(DEFAULT_INDEXING_THRESHOLD)
+            # New chunks can change the answer to any cached query
+            self._search_cache.clear()
         
         # Update metrics
-        count = self.client.count(collection_name=self.collection_name).count
+        count = (await self.client.count(collection_name=self.collection_name)).count
         vector_db_size.set(count)
         
         logger.info(
             "documents_upserted",
-            count=len(points),
+            count=len(ids),
             collection=self.collection_name,
             total_documents=count
         )
@@ -182,28 +422,44 @@ class VectorStore:
         limit = limit or settings.search_limit
         similarity_threshold = similarity_threshold or settings.similarity_threshold
         
-        # Build filter conditions
-        filter_conditions = []
-        if filters:
-            for field, value in filters.items():
-                if value is not None:
-                    filter_conditions.append(
-                        FieldCondition(
-                            key=field,
-                            match=MatchValue(value=value)
-                        )
-                    )
+        # Repeated queries skip the Qdrant round trip
+        cache_key = SearchResultCache.make_key(
+            query_embedding, limit, filters, similarity_threshold
+        )
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            duration = time.time() - start_time
+            track_vector_search(search_type="vector", duration=duration)
+            logger.info(
+                "vector_search_cache_hit",
+                results_count=len(cached),
+                limit=limit,
+                duration=duration
+            )
+            return cached
+        
+        await self._ensure_ready()
+        
+        # Queries reuse a handful of filter shapes, so their Filter objects are memoized
+        search_filter = _build_filter(frozenset(filters.items())) if filters else None
         
         # Perform search
-        search_filter = Filter(must=filter_conditions) if filter_conditions else None
         
-        results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_embedding,
-            limit=limit,
-            query_filter=search_filter,
-            score_threshold=similarity_threshold
-        )
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(SEARCH_ATTEMPTS),
+            wait=wait_exponential_jitter(initial=0.1, max=2.0, jitter=0.1),
+            retry=retry_if_exception(_is_transient),
+            sleep=asyncio.sleep,
+            reraise=True
+        ):
+            with attempt:
+                results = await self.client.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_embedding,
+                    limit=limit,
+                    query_filter=search_filter,
+                    score_threshold=similarity_threshold
+                )
         
         # Format results
         formatted_results = []
@@ -218,6 +474,8 @@ class VectorStore:
                 }
             })
         
+        self._search_cache.set(cache_key, formatted_results)
+        
         duration = time.time() - start_time
         track_vector_search(search_type="vector", duration=duration)
         
@@ -255,35 +513,29 @@ class VectorStore:
         
         # Improved keyword matching with partial matches
         query_terms = query_text.lower().split()
+        keyword_weight = 1 - alpha
         
         # Score and combine results
-        hybrid_results = []
         for result in vector_results:
             text = result["text"].lower()
             
-            # Calculate keyword score with partial matching
+            # Fraction of query terms found as substrings of the chunk
             keyword_score = 0
             if query_terms:
-                matches = 0
-                for term in query_terms:
-                    # Check for partial matches (substring matching)
-                    if term in text:
-                        matches += 1
-                keyword_score = matches / len(query_terms)
+                keyword_score = sum(term in text for term in query_terms) / len(query_terms)
             
             # Combine scores
             vector_score = result["score"]
-            combined_score = alpha * vector_score + (1 - alpha) * keyword_score
-            
             result["vector_score"] = vector_score
             result["keyword_score"] = keyword_score
-            result["score"] = combined_score
-            
-            hybrid_results.append(result)
+            result["score"] = alpha * vector_score + keyword_weight * keyword_score
         
-        # Sort by combined score and limit
-        hybrid_results.sort(key=lambda x: x["score"], reverse=True)
-        hybrid_results = hybrid_results[:limit or settings.search_limit]
+        # Keep only the top results instead of sorting every candidate
+        hybrid_results = heapq.nlargest(
+            limit or settings.search_limit,
+            vector_results,
+            key=itemgetter("score")
+        )
         
         duration = time.time() - start_time
         track_vector_search(search_type="hybrid", duration=duration)
@@ -300,28 +552,27 @@ class VectorStore:
     async def delete_document(self, document_id: str) -> bool:
         """Delete all chunks of a document."""
         try:
-            # Delete by document_id filter
-            self.client.delete(
+            await self._ensure_ready()
+            
+            # Delete by document_id filter, waiting until it is applied so a search
+            # can't cache the deleted chunks again after the clear below
+            await self.client.delete(
                 collection_name=self.collection_name,
-                points_selector=Filter(
-                    must=[
-                        FieldCondition(
-                            key="document_id",
-                            match=MatchValue(value=document_id)
-                        )
-                    ]
-                )
+                points_selector=FilterSelector(
+                    filter=Filter(
+                        must=[
+                            FieldCondition(
+                                key="document_id",
+                                match=MatchValue(value=document_id)
+                            )
+                        ]
+                    )
+                ),
+                wait=True
             )
+            self._search_cache.clear()
             
-            # Update metrics
-            count = self.client.count(collection_name=self.collection_name).count
-            vector_db_size.set(count)
-            
-            logger.info(
-                "document_deleted",
-                document_id=document_id,
-                remaining_documents=count
-            )
+            logger.info("document_deleted", document_id=document_id)
             
             return True
             
@@ -329,43 +580,79 @@ class VectorStore:
             logger.error("document_deletion_failed", document_id=document_id, error=str(e))
             return False
     
+    async def _scroll_pages(self, page_size: int = 1000, **kwargs):
+        """Yield scroll records page by page, following next_page_offset."""
+        next_offset = None
+        while True:
+            records, next_offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                limit=page_size,
+                offset=next_offset,
+                **kwargs
+            )
+            for record in records:
+                yield record
+            if next_offset is None:
+                break
+    
     async def list_documents(
         self, 
         offset: int = 0, 
         limit: int = 100
     ) -> Tuple[List[Dict[str, Any]], int]:
         """List all unique documents with metadata."""
-        # Get all points (inefficient for large collections, but works for demo)
-        all_points = self.client.scroll(
-            collection_name=self.collection_name,
-            limit=1000,  # Adjust based on expected collection size
-            with_payload=True,
-            with_vectors=False
-        )[0]
-        
-        # Group by document_id
-        documents = {}
-        for point in all_points:
-            doc_id = point.payload.get("document_id")
-            if doc_id and doc_id not in documents:
-                documents[doc_id] = {
-                    "document_id": doc_id,
-                    "document_type": point.payload.get("document_type", "unknown"),
-                    "filename": point.payload.get("filename", ""),
-                    "timestamp": point.payload.get("timestamp"),
-                    "chunk_count": 0
-                }
-            if doc_id:
-                documents[doc_id]["chunk_count"] += 1
+        await self._ensure_ready()
         
-        # Convert to list and paginate
-        doc_list = list(documents.values())
-        total = len(doc_list)
+        # A document's first chunk carries its metadata, so scan one record per document,
+        # keeping only the newest offset + limit in a min-heap as pages stream in
+        seen = set()
+        newest = []
+        keep = offset + limit
+        async for point in self._scroll_pages(
+            scroll_filter=Filter(
+                must=[FieldCondition(key="chunk_id", match=MatchValue(value=0))]
+            ),
+            with_payload=PayloadSelectorInclude(include=LISTING_PAYLOAD_FIELDS),
+            with_vectors=False
+        ):
+            payload = point.payload
+            doc_id = payload.get("document_id")
+            if not doc_id or doc_id in seen:
+                continue
+            seen.add(doc_id)
+            document = {
+                "document_id": doc_id,
+                "document_type": payload.get("document_type", "unknown"),
+                "filename": payload.get("filename", ""),
+                "timestamp": payload.get("timestamp"),
+                "chunk_count": 0
+            }
+            # Earlier documents win timestamp ties, as with a stable sort
+            entry = (document.get("timestamp", 0), -len(seen), document)
+            if len(newest) < keep:
+                heapq.heappush(newest, entry)
+            else:
+                heapq.heappushpop(newest, entry)
         
-        # Sort by timestamp (newest first)
-        doc_list.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
+        total = len(seen)
         
         # Paginate
-        paginated = doc_list[offset:offset + limit]
+        paginated = [entry[2] for entry in sorted(newest, reverse=True)][offset:]
+        
+        if paginated:
+            # Qdrant counts chunks for just this page instead of shipping every chunk
+            page_ids = [doc["document_id"] for doc in paginated]
+            counts = await self.client.facet(
+                collection_name=self.collection_name,
+                key="document_id",
+                facet_filter=Filter(
+                    must=[FieldCondition(key="document_id", match=MatchAny(any=page_ids))]
+                ),
+                limit=len(page_ids),
+                exact=True
+            )
+            chunk_counts = {hit.value: hit.count for hit in counts.hits}
+            for doc in paginated:
+                doc["chunk_count"] = chunk_counts.get(doc["document_id"], 0)
         
         return paginated, total
\ No newline at end of file
@@ -51,6 +51,28 @@ def retry_on_openai_error(max_retries: int = 3, delay: float = 1.0):
     return decorator
 
 
+@pytest.fixture
+def event_loop():
+    """Run async tests on uvloop when it is installed."""
+    try:
+        import uvloop
+        loop = uvloop.new_event_loop()
+    except ImportError:
+        loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Test client shared across the session, so the app starts up once."""
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+    
+    with TestClient(app) as test_client:
+        yield test_client
+
+
 @pytest.fixture
 def mock_openai_client():
     """Mock OpenAI client for testing."""
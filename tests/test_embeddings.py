@@ -5,10 +5,16 @@ import pytest
 from unittest.mock import Mock, patch, AsyncMock, PropertyMock, MagicMock
 import numpy as np
 import asyncio
+import httpx
 
-from src.processing.embeddings import EmbeddingGenerator
+from src.processing.embeddings import EmbeddingGenerator, EmbeddingCache
 from src.config import settings
 
+# Row i holds 0.1 * (i + 1) for every dimension; sized for the largest mocked batch
+MOCK_EMBEDDING_ROWS = np.repeat(
+    0.1 * np.arange(1, 201, dtype=np.float32)[:, None], 1536, axis=1
+)
+
 
 class TestEmbeddingGenerator:
     """Test EmbeddingGenerator class."""
@@ -17,22 +23,18 @@ class TestEmbeddingGenerator:
     def mock_httpx_client(self):
         """Mock httpx for OpenAI API calls."""
         with patch('httpx.AsyncClient') as mock_class:
-            mock_client = MagicMock()
             mock_instance = MagicMock()
-            mock_class.return_value.__aenter__.return_value = mock_instance
-            mock_class.return_value.__aexit__.return_value = None
+            mock_class.return_value = mock_instance
             
             # Create mock response
             async def mock_post(*args, **kwargs):
                 data = kwargs.get('json', {})
                 input_texts = data.get('input', [])
                 
-                mock_embeddings = []
-                for i, text in enumerate(input_texts):
-                    mock_embeddings.append({
-                        "embedding": [0.1 * (i + 1)] * 1536,
-                        "index": i
-                    })
+                mock_embeddings = [
+                    {"embedding": MOCK_EMBEDDING_ROWS[i], "index": i}
+                    for i in range(len(input_texts))
+                ]
                 
                 mock_response = Mock()
                 mock_response.status_code = 200
@@ -51,6 +53,7 @@ class TestEmbeddingGenerator:
             mock_settings.embedding_model = "text-embedding-ada-002"
             mock_settings.batch_size = 32
             mock_settings.openai_api_key = "test-key"
+            mock_settings.embedding_cache_size = 1000
             
             generator = EmbeddingGenerator()
             # Force the model to be OpenAI
@@ -102,25 +105,82 @@ class TestEmbeddingGenerator:
         """Test error handling in embedding generation."""
         with patch('httpx.AsyncClient') as mock_class:
             mock_instance = MagicMock()
-            mock_class.return_value.__aenter__.return_value = mock_instance
-            mock_class.return_value.__aexit__.return_value = None
+            mock_class.return_value = mock_instance
+            
+            # Make post raise a transient network error on every attempt
+            mock_instance.post = AsyncMock(side_effect=httpx.ConnectError("API Error"))
             
-            # Make post raise an exception
-            mock_instance.post = AsyncMock(side_effect=Exception("API Error"))
+            with patch('src.processing.embeddings.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+                with pytest.raises(httpx.ConnectError):
+                    await embedding_generator.generate_embeddings(["test text"])
             
-            # The retry decorator will retry 3 times, so we expect it to eventually fail
-            with pytest.raises(Exception):
-                await embedding_generator.generate_embeddings(["test text"])
+            # Each batch is retried up to 5 times, backing off with asyncio.sleep between attempts
+            assert mock_instance.post.call_count == 5
+            assert mock_sleep.await_count == 4
+    
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self, embedding_generator, mock_httpx_client):
+        """Test non-transient API errors fail without retrying."""
+        response = Mock(status_code=400, text="bad request", headers={})
+        mock_httpx_client.post = AsyncMock(return_value=response)
+        
+        with pytest.raises(Exception, match="HTTP 400"):
+            await embedding_generator.generate_embeddings(["test text"])
+        
+        assert mock_httpx_client.post.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_retry_honors_retry_after(self, embedding_generator, mock_httpx_client):
+        """Test rate-limited requests wait for the Retry-After interval."""
+        mock_post = mock_httpx_client.post
+        rate_limited = Mock(status_code=429, text="slow down", headers={"retry-after": "7"})
+        calls = []
+        
+        async def flaky_post(*args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                return rate_limited
+            return await mock_post(*args, **kwargs)
+        
+        mock_httpx_client.post = flaky_post
+        
+        with patch('src.processing.embeddings.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            results = await embedding_generator.generate_embeddings(["test text"])
+        
+        assert len(results) == 1
+        assert len(calls) == 2
+        mock_sleep.assert_awaited_once_with(7.0)
     
     @pytest.mark.asyncio
-    async def test_large_batch_processing(self, embedding_generator):
+    async def test_retry_after_is_capped(self, embedding_generator, mock_httpx_client):
+        """Test an oversized Retry-After is clamped to the backoff ceiling."""
+        mock_post = mock_httpx_client.post
+        rate_limited = Mock(status_code=429, text="slow down", headers={"retry-after": "3600"})
+        calls = []
+        
+        async def flaky_post(*args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                return rate_limited
+            return await mock_post(*args, **kwargs)
+        
+        mock_httpx_client.post = flaky_post
+        
+        with patch('src.processing.embeddings.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            results = await embedding_generator.generate_embeddings(["test text"])
+        
+        assert len(results) == 1
+        mock_sleep.assert_awaited_once_with(20.0)
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("count", [100, 1000])
+    async def test_large_batch_processing(self, embedding_generator, count):
         """Test processing large batches of text."""
-        # Create 100 texts
-        texts = [f"text {i}" for i in range(100)]
+        texts = [f"text {i}" for i in range(count)]
         
         results = await embedding_generator.generate_embeddings(texts)
         
-        assert len(results) == 100
+        assert len(results) == count
         assert all(len(res["embedding"]) == 1536 for res in results)
         assert all(res["text"] == f"text {i}" for i, res in enumerate(results))
     
@@ -145,6 +205,81 @@ class TestEmbeddingGenerator:
         assert results[0][0]["text"] == "async text 1"
         assert results[1][0]["text"] == "async text 2"
     
+    @pytest.mark.asyncio
+    async def test_async_generation_shares_client(self, embedding_generator, mock_httpx_client):
+        """Test concurrent generations overlap on one shared client."""
+        mock_post = mock_httpx_client.post
+        calls = 0
+        in_flight = 0
+        peak = 0
+        
+        async def slow_post(*args, **kwargs):
+            nonlocal calls, in_flight, peak
+            calls += 1
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.005)
+            in_flight -= 1
+            return await mock_post(*args, **kwargs)
+        
+        mock_httpx_client.post = slow_post
+        
+        # Distinct texts per call so the embedding cache never short-circuits a request
+        await asyncio.gather(
+            embedding_generator.generate_embeddings(["gather a"]),
+            embedding_generator.generate_embeddings(["gather b"])
+        )
+        
+        assert embedding_generator.http_client is mock_httpx_client
+        assert calls == 2
+        # Both requests were in flight on the shared client at the same time
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_http_client_uses_http2(self, embedding_generator):
+        """Test the client is built once per event loop, with HTTP/2 enabled."""
+        with patch('httpx.AsyncClient') as mock_class:
+            client = embedding_generator.http_client
+            
+            assert embedding_generator.http_client is client
+            mock_class.assert_called_once_with(timeout=60.0, http2=True)
+            
+            # Another loop, such as a sync tool wrapper's, gets a client of its own
+            async def client_on_other_loop():
+                return embedding_generator.http_client
+            
+            await asyncio.to_thread(asyncio.run, client_on_other_loop())
+            assert mock_class.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_dedups_identical_inputs(self, embedding_generator, mock_httpx_client):
+        """Test identical texts are only sent to the API once."""
+        mock_post = mock_httpx_client.post
+        requested = []
+        
+        async def recording_post(*args, **kwargs):
+            requested.extend(kwargs["json"]["input"])
+            return await mock_post(*args, **kwargs)
+        
+        mock_httpx_client.post = recording_post
+        
+        results = await embedding_generator.generate_embeddings(["x", "y", "x"])
+        
+        assert requested == ["x", "y"]
+        assert [res["text"] for res in results] == ["x", "y", "x"]
+        assert results[0]["embedding"] == results[2]["embedding"]
+    
+    @pytest.mark.asyncio
+    async def test_cached_embeddings_skip_api(self, embedding_generator, mock_httpx_client):
+        """Test repeated texts across calls are served from the cache."""
+        first = await embedding_generator.generate_embeddings(["cached text"])
+        
+        mock_httpx_client.post = AsyncMock(side_effect=Exception("should not be called"))
+        second = await embedding_generator.generate_embeddings(["cached text"])
+        
+        assert second[0]["embedding"] == first[0]["embedding"]
+        mock_httpx_client.post.assert_not_called()
+    
     @pytest.mark.asyncio
     async def test_embedding_dimension_validation(self, embedding_generator):
         """Test that embeddings have correct dimensions."""
@@ -152,4 +287,30 @@ class TestEmbeddingGenerator:
         
         assert len(results[0]["embedding"]) == 1536
         # Check it's a list of floats
-        assert all(isinstance(x, (int, float)) for x in results[0]["embedding"])
\ No newline at end of file
+        assert all(isinstance(x, (int, float)) for x in results[0]["embedding"])
+
+
+class TestEmbeddingCache:
+    """Test EmbeddingCache class."""
+    
+    def test_evicts_least_recently_used(self):
+        """Test the least recently used entry is evicted first."""
+        cache = EmbeddingCache(max_size=2)
+        cache.set("a", np.zeros(3, dtype=np.float32))
+        cache.set("b", np.ones(3, dtype=np.float32))
+        
+        # Touch "a" so "b" becomes the eviction candidate
+        assert cache.get("a") is not None
+        cache.set("c", np.ones(3, dtype=np.float32))
+        
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+    
+    def test_keys_include_model(self):
+        """Test entries are namespaced by model name."""
+        cache = EmbeddingCache()
+        cache.set("text", np.zeros(3, dtype=np.float32), model="model-a")
+        
+        assert cache.get("text", model="model-a") is not None
+        assert cache.get("text", model="model-b") is None
@@ -4,12 +4,10 @@ Tests for monitoring and observability modules.
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import json
+import threading
 import structlog
-from prometheus_client import REGISTRY
-import redis
-import logging
-import time
 
+from src.monitoring import logger as logger_module
 from src.monitoring.logger import setup_logging, get_logger, log_request, log_error, RedisLogProcessor
 from src.monitoring.metrics import (
     request_count,
@@ -25,10 +23,29 @@ from src.monitoring.metrics import (
 )
 
 
+@pytest.fixture(scope="module")
+def registry():
+    """Prometheus default registry, imported only by the tests that need it."""
+    from prometheus_client import REGISTRY
+    return REGISTRY
+
+
+@pytest.fixture
+def restore_logging(monkeypatch):
+    """Restore structlog and the logger module globals after setup_logging runs."""
+    saved_config = structlog.get_config()
+    monkeypatch.setattr(logger_module, "_configured", logger_module._configured)
+    monkeypatch.setattr(logger_module, "redis_log_processor", logger_module.redis_log_processor)
+    yield
+    structlog.reset_defaults()
+    structlog.configure(**saved_config)
+    get_logger.cache_clear()
+
+
 class TestStructuredLogging:
     """Test structured logging functionality."""
     
-    def test_setup_logging_configures_structlog(self):
+    def test_setup_logging_configures_structlog(self, restore_logging):
         """Test that setup_logging properly configures structlog."""
         with patch('src.monitoring.logger.RedisLogProcessor') as mock_redis:
             setup_logging()
@@ -46,6 +63,34 @@ class TestStructuredLogging:
         assert hasattr(logger, 'error')
         assert hasattr(logger, 'debug')
     
+    def test_get_logger_is_cached_per_name(self, restore_logging):
+        """Test get_logger reuses loggers until logging is reconfigured."""
+        logger = get_logger("cached_module")
+        assert get_logger("cached_module") is logger
+        assert get_logger("other_module") is not logger
+        
+        with patch('src.monitoring.logger.RedisLogProcessor'):
+            setup_logging(force=True)
+        
+        assert get_logger("cached_module") is not logger
+    
+    def test_setup_logging_runs_once_unless_forced(self, restore_logging):
+        """Test repeated setup_logging calls keep the first configuration."""
+        with patch('src.monitoring.logger.RedisLogProcessor') as mock_processor, \
+                patch('src.monitoring.logger.redis_log_processor', None), \
+                patch('src.monitoring.logger.structlog.configure') as mock_configure:
+            setup_logging(force=True)
+            setup_logging()
+            setup_logging()
+            assert mock_configure.call_count == 1
+            assert mock_processor.call_count == 1
+            
+            setup_logging(force=True)
+            assert mock_configure.call_count == 2
+            # Forced reconfigure reuses the running processor and its drain thread
+            assert mock_processor.call_count == 1
+            mock_processor.return_value.start.assert_called_once()
+    
     def test_log_request_creates_context(self):
         """Test log_request creates proper context dict."""
         context = log_request(
@@ -82,6 +127,12 @@ class TestStructuredLogging:
             assert processor.redis_client is not None
             assert processor.ttl == 3600
             assert processor.max_recent_logs == 1000
+            
+            # Processors share one connection pool
+            from src.monitoring.logger import get_redis_pool
+            mock_redis.assert_called_once_with(connection_pool=get_redis_pool())
+            RedisLogProcessor()
+            assert mock_redis.call_args_list[1] == mock_redis.call_args_list[0]
     
     def test_redis_log_processor_saves_logs(self):
         """Test RedisLogProcessor saves logs to Redis."""
@@ -100,23 +151,126 @@ class TestStructuredLogging:
             }
             
             result = processor(None, "info", event_dict)
-            
-            # Should save to Redis
-            mock_redis.setex.assert_called()
-            mock_redis.lpush.assert_called()
             assert result == event_dict
+            
+            # Nothing is written until the queue is drained
+            mock_redis.pipeline.assert_not_called()
+            processor.flush()
+            
+            # Should save to Redis in one pipelined round trip
+            pipe = mock_redis.pipeline.return_value
+            mock_redis.pipeline.assert_called_once_with(transaction=False)
+            pipe.setex.assert_called()
+            payload = pipe.setex.call_args[0][2]
+            assert payload.startswith(b'{')
+            assert json.loads(payload)["correlation_id"] == "test-123"
+            pipe.lpush.assert_any_call("logs:recent", pipe.setex.call_args[0][0])
+            pipe.lpush.assert_any_call("logs:correlation:test-123", pipe.setex.call_args[0][0])
+            pipe.lpush.assert_any_call("logs:level:info", pipe.setex.call_args[0][0])
+            pipe.ltrim.assert_any_call("logs:level:info", 0, processor.max_recent_logs - 1)
+            pipe.execute.assert_called_once()
+    
+    def test_redis_log_processor_reuses_event_timestamp(self):
+        """Test the clock is only read for events without a timestamp."""
+        with patch('redis.Redis'), \
+                patch('src.monitoring.logger.datetime') as mock_datetime:
+            mock_datetime.now.return_value.isoformat.return_value = "2024-06-01T00:00:00"
+            processor = RedisLogProcessor()
+            
+            processor(None, "info", {"timestamp": "2024-01-01T00:00:00Z", "correlation_id": "abc"})
+            mock_datetime.now.assert_not_called()
+            
+            processor(None, "info", {"event": "no timestamp"})
+            mock_datetime.now.assert_called_once()
+            
+            keys = [processor._queue.get_nowait()[0] for _ in range(2)]
+            assert keys[0].startswith("log:2024-01-01T00:00:00Z:abc:")
+            assert keys[1].startswith("log:2024-06-01T00:00:00:none:")
+    
+    def test_redis_log_processor_batches_trims(self):
+        """Test RedisLogProcessor trims each list once per batch."""
+        with patch('redis.Redis') as mock_redis_class:
+            mock_redis = Mock()
+            mock_redis_class.return_value = mock_redis
+            
+            processor = RedisLogProcessor()
+            for i in range(5):
+                processor(None, "info", {"correlation_id": "test-123", "event": f"event_{i}"})
+            processor.flush()
+            
+            pipe = mock_redis.pipeline.return_value
+            assert pipe.setex.call_count == 5
+            pipe.ltrim.assert_any_call("logs:recent", 0, processor.max_recent_logs - 1)
+            assert pipe.ltrim.call_count == 2  # recent list + one correlation list
+            pipe.execute.assert_called_once()
+    
+    def test_redis_log_processor_worker_ships_logs(self):
+        """Test the background worker writes queued logs without a flush."""
+        with patch('redis.Redis') as mock_redis_class:
+            mock_redis = Mock()
+            written = threading.Event()
+            mock_redis.pipeline.return_value.execute.side_effect = lambda: written.set()
+            mock_redis_class.return_value = mock_redis
+            
+            processor = RedisLogProcessor()
+            with patch('src.monitoring.logger.atexit.register') as mock_register:
+                processor.start()
+                mock_register.assert_called_once_with(processor.flush)
+            
+            processor(None, "info", {"correlation_id": "test-123", "event": "queued"})
+            
+            assert written.wait(timeout=2)
+            mock_redis.pipeline.return_value.setex.assert_called_once()
+    
+    def test_redis_log_processor_encodes_rich_values(self):
+        """Test datetimes and arbitrary objects are encoded to JSON bytes."""
+        from datetime import datetime
+        with patch('redis.Redis') as mock_redis_class:
+            mock_redis = Mock()
+            mock_redis_class.return_value = mock_redis
+            
+            processor = RedisLogProcessor()
+            processor(None, "info", {
+                "event": "rich",
+                "at": datetime(2024, 1, 1, 12, 0, 0),
+                "error": ValueError("boom"),
+                404: "non-string key",
+            })
+            processor.flush()
+            
+            payload = json.loads(mock_redis.pipeline.return_value.setex.call_args[0][2])
+            assert payload["at"] == "2024-01-01T12:00:00Z"
+            assert payload["error"] == "boom"
+            assert payload["404"] == "non-string key"
+    
+    def test_redis_log_processor_drops_when_queue_full(self, registry):
+        """Test RedisLogProcessor drops events instead of blocking when full."""
+        dropped_before = registry.get_sample_value("rag_logs_dropped_total") or 0
+        with patch('redis.Redis') as mock_redis_class:
+            mock_redis = Mock()
+            mock_redis_class.return_value = mock_redis
+            
+            processor = RedisLogProcessor(max_queue_size=2)
+            for i in range(5):
+                event_dict = {"event": f"event_{i}"}
+                assert processor(None, "info", event_dict) == event_dict
+            processor.flush()
+            
+            assert mock_redis.pipeline.return_value.setex.call_count == 2
+            assert registry.get_sample_value("rag_logs_dropped_total") == dropped_before + 3
     
     def test_redis_log_processor_handles_errors(self, capsys):
         """Test RedisLogProcessor handles Redis errors gracefully."""
         with patch('redis.Redis') as mock_redis_class:
             mock_redis = Mock()
-            mock_redis.setex.side_effect = Exception("Redis error")
+            mock_redis.pipeline.return_value.execute.side_effect = Exception("Redis error")
             mock_redis_class.return_value = mock_redis
             
             processor = RedisLogProcessor()
             event_dict = {"message": "test"}
             
             result = processor(None, "info", event_dict)
+            processor.flush()
             
             # Should not raise, just print error
             captured = capsys.readouterr()
@@ -127,94 +281,156 @@ class TestStructuredLogging:
 class TestMetrics:
     """Test metrics functionality."""
     
-    def test_metrics_registered(self):
+    @pytest.fixture(scope="class")
+    def metric_names(self, registry):
+        """Names of all registered metric families, collected once per class."""
+        return {metric.name for metric in registry.collect()}
+    
+    def test_metrics_registered(self, metric_names):
         """Test that metrics are registered."""
-        # Import to ensure metrics are registered
-        import src.monitoring.metrics
-        
-        # Check that metrics are registered
-        metric_names = [metric.name for metric in REGISTRY.collect()]
-        assert any("rag_api_requests" in name for name in metric_names)
-        assert any("rag_documents_processed" in name for name in metric_names)
-        assert any("rag_vector_search" in name for name in metric_names)
+        assert "rag_api_requests" in metric_names
+        assert "rag_documents_processed" in metric_names
+        assert "rag_vector_search_duration_seconds" in metric_names
     
-    def test_track_request_function(self):
+    def test_track_request_function(self, registry):
         """Test track_request function."""
+        labels = {"method": "GET", "endpoint": "/test", "status": "200"}
+        before = registry.get_sample_value("rag_api_requests_total", labels) or 0
+        
         # Track a request
         track_request(method="GET", endpoint="/test", status_code=200, duration=0.1)
         
         # Check metrics were updated
-        metrics = list(REGISTRY.collect())
-        request_metrics = [m for m in metrics if "rag_api_requests" in m.name]
-        assert len(request_metrics) > 0
+        assert registry.get_sample_value("rag_api_requests_total", labels) == before + 1
+        assert registry.get_sample_value(
+            "rag_api_request_duration_seconds_count", {"method": "GET", "endpoint": "/test"}
+        ) >= 1
+    
+    def test_track_request_reuses_labelled_child(self, registry):
+        """Test repeated track_request calls update the same cached child."""
+        labels = {"method": "POST", "endpoint": "/cached", "status": "201"}
+        before = registry.get_sample_value("rag_api_requests_total", labels) or 0
+        
+        track_request(method="POST", endpoint="/cached", status_code=201, duration=0.1)
+        track_request(method="POST", endpoint="/cached", status_code=201, duration=0.2)
+        
+        assert registry.get_sample_value("rag_api_requests_total", labels) == before + 2
+        from src.monitoring.metrics import _request_count_child
+        assert _request_count_child("POST", "/cached", 201) is _request_count_child("POST", "/cached", 201)
+    
+    def test_endpoint_label_collapses_ids(self, registry):
+        """Test ids in request paths do not create new label values."""
+        from src.monitoring.metrics import _normalize_endpoint
+        assert _normalize_endpoint("/documents/123") == "/documents/:id"
+        assert _normalize_endpoint(
+            "/jobs/3f2a9c1e-8b7d-4e6f-9a0b-1c2d3e4f5a6b"
+        ) == "/jobs/:id"
+        assert _normalize_endpoint("/batch-ingest") == "/batch-ingest"
+        assert len(_normalize_endpoint("/" + "x" * 200)) == 64
+        
+        labels = {"method": "DELETE", "endpoint": "/documents/:id", "status": "200"}
+        before = registry.get_sample_value("rag_api_requests_total", labels) or 0
+        track_request(method="DELETE", endpoint="/documents/42", status_code=200, duration=0.1)
+        track_request(method="DELETE", endpoint="/documents/43", status_code=200, duration=0.1)
+        assert registry.get_sample_value("rag_api_requests_total", labels) == before + 2
     
-    def test_track_error_function(self):
+    def test_endpoint_label_aggregated(self):
+        """Test AGGREGATE_METRICS drops the endpoint dimension."""
+        from src.monitoring.metrics import _normalize_endpoint
+        with patch('src.monitoring.metrics.settings') as mock_settings:
+            mock_settings.aggregate_metrics = True
+            assert _normalize_endpoint("/documents/123") == "all"
+    
+    def test_unknown_doc_types_are_bucketed(self):
+        """Test unexpected document types share the 'other' label value."""
+        from src.monitoring.metrics import _normalize_doc_type
+        from src.processing.validation import SUPPORTED_FORMATS
+        assert _normalize_doc_type("PDF") == "pdf"
+        assert _normalize_doc_type(".txt") == "txt"
+        assert _normalize_doc_type("json") == "json"
+        assert _normalize_doc_type("md") == "other"
+        assert all(_normalize_doc_type(t) == t for t in SUPPORTED_FORMATS.values())
+        assert _normalize_doc_type("docx") == "other"
+        assert _normalize_doc_type(None) == "other"
+    
+    def test_track_error_function(self, registry):
         """Test track_error function."""
+        labels = {"error_type": "ValueError", "endpoint": "/test"}
+        before = registry.get_sample_value("rag_errors_total", labels) or 0
+        
         # Track an error
         track_error(error_type="ValueError", endpoint="/test")
         
         # Check error was tracked
-        metrics = list(REGISTRY.collect())
-        error_metrics = [m for m in metrics if "rag_errors" in m.name]
-        assert len(error_metrics) > 0
+        assert registry.get_sample_value("rag_errors_total", labels) == before + 1
     
-    def test_track_document_processing_function(self):
+    def test_track_document_processing_function(self, registry):
         """Test track_document_processing function."""
+        count_labels = {"status": "success"}
+        duration_labels = {"document_type": "pdf"}
+        before = registry.get_sample_value("rag_documents_processed_total", count_labels) or 0
+        before_sum = registry.get_sample_value(
+            "rag_document_processing_duration_seconds_sum", duration_labels
+        ) or 0
+        
         # Track document processing
         track_document_processing(status="success", duration=1.5, doc_type="pdf")
         
         # Check metrics
-        metrics = list(REGISTRY.collect())
-        doc_metrics = [m for m in metrics if "rag_documents_processed" in m.name or "rag_document_processing" in m.name]
-        assert len(doc_metrics) > 0
+        assert registry.get_sample_value("rag_documents_processed_total", count_labels) == before + 1
+        assert registry.get_sample_value(
+            "rag_document_processing_duration_seconds_sum", duration_labels
+        ) == pytest.approx(before_sum + 1.5)
     
-    def test_track_vector_search_function(self):
+    def test_track_vector_search_function(self, registry):
         """Test track_vector_search function."""
+        labels = {"search_type": "hybrid"}
+        before = registry.get_sample_value("rag_vector_search_duration_seconds_count", labels) or 0
+        
         # Track vector search
         track_vector_search(search_type="hybrid", duration=0.5)
         
         # Check metrics
-        metrics = list(REGISTRY.collect())
-        search_metrics = [m for m in metrics if "rag_vector_search" in m.name]
-        assert len(search_metrics) > 0
+        assert registry.get_sample_value("rag_vector_search_duration_seconds_count", labels) == before + 1
     
-    def test_track_embedding_generation_function(self):
+    def test_track_embedding_generation_function(self, registry):
         """Test track_embedding_generation function."""
+        metric = "rag_embedding_generation_duration_seconds_sum"
+        before = registry.get_sample_value(metric) or 0
+        
         # Track embedding generation
         track_embedding_generation(duration=2.0)
         
         # Check metrics
-        metrics = list(REGISTRY.collect())
-        embed_metrics = [m for m in metrics if "rag_embedding" in m.name]
-        assert len(embed_metrics) > 0
+        assert registry.get_sample_value(metric) == pytest.approx(before + 2.0)
     
-    def test_vector_db_size_gauge(self):
+    def test_vector_db_size_gauge(self, registry):
         """Test vector_db_size gauge updates."""
         # Set a value
         vector_db_size.set(1000)
         
         # Check it was set
-        metrics = list(REGISTRY.collect())
-        size_metrics = [m for m in metrics if "rag_vector_db" in m.name]
-        assert len(size_metrics) > 0
+        assert registry.get_sample_value("rag_vector_db_documents") == 1000
     
-    def test_measure_time_decorator(self):
+    def test_measure_time_decorator(self, registry):
         """Test measure_time decorator."""
         from src.monitoring.metrics import measure_time
         
         # Test with sync function
         @measure_time(lambda duration: track_embedding_generation(duration))
         def sync_func():
-            time.sleep(0.01)
             return "done"
         
-        result = sync_func()
+        metric = "rag_embedding_generation_duration_seconds_sum"
+        before = registry.get_sample_value(metric) or 0
+        
+        # Drive the clock instead of sleeping
+        with patch("src.monitoring.metrics.time.perf_counter", side_effect=[100.0, 100.5]):
+            result = sync_func()
         assert result == "done"
         
-        # Check metrics were updated
-        metrics = list(REGISTRY.collect())
-        embed_metrics = [m for m in metrics if "rag_embedding" in m.name]
-        assert len(embed_metrics) > 0
+        # Check the measured duration was recorded
+        assert registry.get_sample_value(metric) == pytest.approx(before + 0.5)
 
 
 class TestProfilingIntegration:
@@ -56,6 +56,16 @@ class TestTimestampParsing:
         # Should be close to current time
         now = datetime.now()
         assert abs((result - now).total_seconds()) < 1
+    
+    def test_parse_timestamp_defaults_to_utc(self):
+        """Test timestamps without an offset are read as UTC."""
+        plain = parse_timestamp("2024-01-01T12:00:00")
+        precise = parse_timestamp("2024-01-01T12:00:00.500000")
+        zulu = parse_timestamp("2024-01-01T12:00:00Z")
+        
+        assert plain == zulu
+        assert plain.utcoffset().total_seconds() == 0
+        assert (precise - plain).total_seconds() == 0.5
 
 
 class TestAnalyzeRequestLogs:
@@ -202,6 +212,65 @@ class TestAggregatePerformanceStats:
         # Should have stats for embedding_generation phase
         if "embedding_generation" in result["phase_stats"]:
             assert "avg" in result["phase_stats"]["embedding_generation"]
+    
+    def test_aggregate_duration_values(self):
+        """Test aggregated duration statistics values."""
+        logs = []
+        for i, seconds in enumerate([1, 2, 3]):
+            logs.append({
+                "event": "request_started",
+                "correlation_id": f"req-{i}",
+                "timestamp": f"2024-01-01T12:0{i}:00"
+            })
+            logs.append({
+                "event": "request_completed",
+                "correlation_id": f"req-{i}",
+                "timestamp": f"2024-01-01T12:0{i}:0{seconds}"
+            })
+        
+        stats = aggregate_performance_stats(logs)["duration_stats"]
+        
+        assert stats["avg"] == pytest.approx(2.0)
+        assert stats["min"] == 1.0
+        assert stats["max"] == 3.0
+        assert stats["p50"] == pytest.approx(2.0)
+        assert 2.0 <= stats["p95"] <= 3.0
+        assert stats["count"] == 3
+        assert isinstance(stats["avg"], float)
+    
+    def test_aggregate_newest_first_logs(self):
+        """Test logs read newest-first from Redis are streamed in time order."""
+        logs = []
+        for i in range(12):
+            logs.extend([
+                {"event": "request_started", "correlation_id": f"req-{i}",
+                 "timestamp": f"2024-01-01T12:{i:02d}:00"},
+                {"event": "vector_search_started", "correlation_id": f"req-{i}",
+                 "timestamp": f"2024-01-01T12:{i:02d}:01"},
+                {"event": "vector_search_completed", "correlation_id": f"req-{i}",
+                 "timestamp": f"2024-01-01T12:{i:02d}:03"},
+                {"event": "request_completed", "correlation_id": f"req-{i}",
+                 "timestamp": f"2024-01-01T12:{i:02d}:04"},
+            ])
+        # A request still in flight contributes nothing
+        logs.extend([
+            {"event": "request_started", "correlation_id": "req-open",
+             "timestamp": "2024-01-01T13:00:00"},
+            {"event": "vector_search_started", "correlation_id": "req-open",
+             "timestamp": "2024-01-01T13:00:01"},
+            {"event": "vector_search_completed", "correlation_id": "req-open",
+             "timestamp": "2024-01-01T13:00:09"},
+        ])
+        
+        result = aggregate_performance_stats(list(reversed(logs)))
+        
+        assert result["total_requests"] == 12
+        assert result["phase_stats"]["vector_search"]["count"] == 12
+        assert result["phase_stats"]["vector_search"]["max"] == 2.0
+        assert result["duration_stats"]["avg"] == 4.0
+        recent = result["recent_requests"]
+        assert [r["correlation_id"] for r in recent] == [f"req-{i}" for i in range(2, 12)]
+        assert recent[-1]["log_count"] == 4
 
 
 class TestIdentifyBottlenecks:
@@ -238,6 +307,19 @@ class TestIdentifyBottlenecks:
         assert len(bottlenecks) >= 1
         assert bottlenecks[0]["phase"] == "document_processing"  # Highest avg
         assert bottlenecks[0]["avg_duration"] == 3.0
+    
+    def test_identify_bottlenecks_top_n(self):
+        """Test only the slowest phases are returned, slowest first."""
+        phase_stats = {
+            f"phase_{i}": {"avg": float(i), "max": float(i * 2), "count": 1}
+            for i in range(20)
+        }
+        
+        bottlenecks = identify_bottlenecks(phase_stats, top_n=3)
+        
+        assert [b["phase"] for b in bottlenecks] == ["phase_19", "phase_18", "phase_17"]
+        assert bottlenecks[0]["percentage"] == pytest.approx(19 / sum(range(20)) * 100)
+        assert len(identify_bottlenecks(phase_stats)) == 10
 
 
 class TestProfilingDecorators:
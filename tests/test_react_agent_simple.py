@@ -1,10 +1,15 @@
 """
 Simplified tests for the ReAct agent module.
 """
+import asyncio
 import pytest
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 from typing import List, Dict, Any
 
+# The agent module imports LangChain at import time; skip cleanly without it
+pytest.importorskip("langchain")
+
+from src.processing import react_agent
 from src.processing.react_agent import (
     DocumentSearchTool,
     SystemInfoTool,
@@ -13,41 +18,67 @@ from src.processing.react_agent import (
 )
 
 
+# Shared, never mutated by the agent, so one immutable copy serves every test
+_DUMMY_EMBEDDING = tuple([0.1] * 1536)
+
+# More results than the search tool formats, built once at import
+_TEN_MOCK_RESULTS = tuple(
+    {"text": f"Result {i}", "score": 0.5, "metadata": {}} for i in range(10)
+)
+
+
+def async_return(value):
+    """Build a plain coroutine function returning value, for stubs never asserted on."""
+    async def _return(*args, **kwargs):
+        return value
+    return _return
+
+
+@pytest.fixture(autouse=True)
+def _reset_agent(monkeypatch):
+    """Give every test a fresh agent singleton, restoring the original after."""
+    monkeypatch.setattr(LangChainReActAgent, "_instance", None)
+    monkeypatch.setattr(react_agent, "_agent_instance", LangChainReActAgent())
+
+
+@pytest.mark.skip(reason="Complex mocking issues with LangChain agents")
 class TestReactAgentIntegration:
     """Test ReAct agent integration."""
     
-    @pytest.mark.skip(reason="Complex mocking issues with LangChain agents")
+    @pytest.fixture
+    def patched_memory(self):
+        """Patch the session memory lookup the agent performs per query."""
+        with patch('src.processing.react_agent.get_conversation_memory') as mock_memory:
+            mock_memory.return_value = Mock()
+            yield mock_memory
+    
     @pytest.mark.asyncio
-    async def test_process_query_with_agent_greeting(self):
+    async def test_process_query_with_agent_greeting(self, patched_memory):
         """Test processing a greeting query."""
         # Simple greeting should not trigger search
-        mock_search = AsyncMock(return_value=[])
+        mock_search = async_return([])
         mock_vector_store = Mock()
-        mock_vector_store.list_documents = AsyncMock(return_value=([], 0))
+        mock_vector_store.list_documents = async_return(([], 0))
         mock_embedding_gen = Mock()
-        mock_embedding_gen.generate_embeddings = AsyncMock(return_value=[{"embedding": [0.1] * 1536, "metadata": {}}])
+        mock_embedding_gen.generate_embeddings = async_return([{"embedding": _DUMMY_EMBEDDING, "metadata": {}}])
         
-        with patch('src.processing.redis_memory.get_conversation_memory') as mock_memory:
-            mock_memory.return_value = Mock()
-            
-            result = await process_query_with_agent(
-                query="Hello!",
-                search_function=mock_search,
-                search_params={},
-                vector_store=mock_vector_store,
-                embedding_generator=mock_embedding_gen,
-                session_id="test"
-            )
+        result = await process_query_with_agent(
+            query="Hello!",
+            search_function=mock_search,
+            search_params={},
+            vector_store=mock_vector_store,
+            embedding_generator=mock_embedding_gen,
+            session_id="test"
+        )
         
         assert "answer" in result
         assert result["agent_action"] == "direct_response"
         assert "Hello" in result["answer"]
     
-    @pytest.mark.skip(reason="Complex mocking issues with LangChain agents")
     @pytest.mark.asyncio
-    async def test_process_query_with_agent_search(self):
+    async def test_process_query_with_agent_search(self, patched_memory):
         """Test processing a query that requires search."""
-        mock_search = AsyncMock(return_value=[
+        mock_search = async_return([
             {
                 "text": "RAG is Retrieval Augmented Generation",
                 "score": 0.95,
@@ -55,47 +86,40 @@ class TestReactAgentIntegration:
             }
         ])
         mock_vector_store = Mock()
-        mock_vector_store.list_documents = AsyncMock(return_value=([], 1))
+        mock_vector_store.list_documents = async_return(([], 1))
         mock_embedding_gen = Mock()
-        mock_embedding_gen.generate_embeddings = AsyncMock(return_value=[{"embedding": [0.1] * 1536, "metadata": {}}])
+        mock_embedding_gen.generate_embeddings = async_return([{"embedding": _DUMMY_EMBEDDING, "metadata": {}}])
         
-        with patch('src.processing.redis_memory.get_conversation_memory') as mock_memory:
-            mock_memory.return_value = Mock()
-            
-            result = await process_query_with_agent(
-                query="What is RAG?",
-                search_function=mock_search,
-                search_params={},
-                vector_store=mock_vector_store,
-                embedding_generator=mock_embedding_gen,
-                session_id="test"
-            )
+        result = await process_query_with_agent(
+            query="What is RAG?",
+            search_function=mock_search,
+            search_params={},
+            vector_store=mock_vector_store,
+            embedding_generator=mock_embedding_gen,
+            session_id="test"
+        )
         
         assert "answer" in result
         assert "results" in result
         assert result["total_results"] >= 0
     
-    @pytest.mark.skip(reason="Complex mocking issues with LangChain agents")
     @pytest.mark.asyncio
-    async def test_process_query_system_info(self):
+    async def test_process_query_system_info(self, patched_memory):
         """Test processing a system info query."""
-        mock_search = AsyncMock(return_value=[])
+        mock_search = async_return([])
         mock_vector_store = Mock()
-        mock_vector_store.list_documents = AsyncMock(return_value=([], 5))
+        mock_vector_store.list_documents = async_return(([], 5))
         mock_embedding_gen = Mock()
-        mock_embedding_gen.generate_embeddings = AsyncMock(return_value=[{"embedding": [0.1] * 1536, "metadata": {}}])
+        mock_embedding_gen.generate_embeddings = async_return([{"embedding": _DUMMY_EMBEDDING, "metadata": {}}])
         
-        with patch('src.processing.redis_memory.get_conversation_memory') as mock_memory:
-            mock_memory.return_value = Mock()
-            
-            result = await process_query_with_agent(
-                query="How many documents are there?",
-                search_function=mock_search,
-                search_params={},
-                vector_store=mock_vector_store,
-                embedding_generator=mock_embedding_gen,
-                session_id="test"
-            )
+        result = await process_query_with_agent(
+            query="How many documents are there?",
+            search_function=mock_search,
+            search_params={},
+            vector_store=mock_vector_store,
+            embedding_generator=mock_embedding_gen,
+            session_id="test"
+        )
         
         assert "answer" in result
         # Should have used system info tool
@@ -105,35 +129,147 @@ class TestReactAgentIntegration:
 class TestDocumentSearchToolSimple:
     """Simplified tests for DocumentSearchTool."""
     
+    @pytest.mark.parametrize("mock_results,expected,unexpected", [
+        (
+            [{"text": "Test result", "score": 0.9, "metadata": {"filename": "test.txt"}}],
+            ["Found 1 relevant document", "Test result", "90.0%", "[From: test.txt]"],
+            [],
+        ),
+        ([], ["No relevant documents found"], ["Found"]),
+        (
+            list(_TEN_MOCK_RESULTS),
+            ["Found 10 relevant documents", "Result 0", "Result 2", "[From: Unknown]"],
+            ["Result 3"],
+        ),
+    ], ids=["one_result", "no_results", "top_three_only"])
     @pytest.mark.asyncio
-    async def test_search_basic(self):
-        """Test basic search functionality."""
-        mock_search = AsyncMock(return_value=[
-            {"text": "Test result", "score": 0.9, "metadata": {"filename": "test.txt"}}
-        ])
+    async def test_search_basic(self, mock_results, expected, unexpected):
+        """Test search formatting across result sets."""
+        # Kept as AsyncMock: the embedding handed to the search is asserted below
+        mock_search = AsyncMock(return_value=mock_results)
         mock_embedding_gen = Mock()
-        mock_embedding_gen.generate_embeddings = AsyncMock(
-            return_value=[{"embedding": [0.1] * 1536}]
-        )
+        mock_embedding_gen.generate_embeddings = async_return([{"embedding": _DUMMY_EMBEDDING}])
         
         tool = DocumentSearchTool(mock_search, {}, mock_embedding_gen)
         result = await tool.search("test query")
         
-        assert "Found 1 relevant document" in result
-        assert "Test result" in result
-        assert tool.last_search_results is not None
+        assert all(s in result for s in expected)
+        assert not any(s in result for s in unexpected)
+        assert tool.last_search_results == mock_results
+        assert mock_search.await_args.kwargs["query_embedding"] is _DUMMY_EMBEDDING
 
 
 class TestSystemInfoToolSimple:
     """Simplified tests for SystemInfoTool."""
     
+    @pytest.mark.parametrize("documents,total,query,expected", [
+        ([], 10, "how many documents", ["10 documents"]),
+        (
+            [{"filename": "guide.pdf", "document_type": "pdf", "chunk_count": 4}],
+            1,
+            "list them",
+            ["contains 1 documents:", "- guide.pdf (PDF, 4 chunks)"],
+        ),
+        ([], 0, "what are the documents", ["No documents have been uploaded yet."]),
+    ], ids=["count", "list", "list_empty"])
     @pytest.mark.asyncio
-    async def test_get_info_basic(self):
-        """Test basic system info retrieval."""
+    async def test_get_info_basic(self, documents, total, query, expected):
+        """Test system info retrieval across query kinds."""
         mock_store = Mock()
-        mock_store.list_documents = AsyncMock(return_value=([], 10))
+        mock_store.list_documents = async_return((documents, total))
         
         tool = SystemInfoTool(mock_store)
-        result = await tool.get_info("how many documents")
+        result = await tool.get_info(query)
+        
+        assert all(s in result for s in expected)
+
+
+class TestAgentSingleton:
+    """Test the agent singleton is isolated per test."""
+    
+    def test_singleton_state_is_shared(self):
+        """Test state set on the agent is shared within a test."""
+        agent = LangChainReActAgent()
+        agent.llm = Mock()
+        agent.doc_search_tool = Mock()
+        
+        assert LangChainReActAgent().llm is agent.llm
+    
+    def test_singleton_pattern(self):
+        """Test the agent is a singleton shared with process_query_with_agent."""
+        agent = LangChainReActAgent()
+        
+        assert LangChainReActAgent() is agent
+        assert react_agent._agent_instance is agent
+        # State set by the previous test did not leak into this one
+        assert agent.llm is None
+
+
+class TestAgentTools:
+    """Test the agent's tools on the paths LangChain calls them through."""
+    
+    @pytest.fixture
+    def client_class(self):
+        """Patch httpx with clients that fail if used off the loop that built them."""
+        def loop_bound_client(*args, **kwargs):
+            client = MagicMock()
+            client.loop = asyncio.get_running_loop()
+            
+            async def post(*args, **kwargs):
+                if asyncio.get_running_loop() is not client.loop:
+                    raise RuntimeError("client is bound to a different event loop")
+                response = Mock(status_code=200)
+                response.json.return_value = {
+                    "data": [{"embedding": list(_DUMMY_EMBEDDING)} for _ in kwargs["json"]["input"]]
+                }
+                return response
+            
+            client.post = post
+            return client
+        
+        with patch('httpx.AsyncClient', side_effect=loop_bound_client) as mock_class:
+            yield mock_class
+    
+    @pytest.fixture
+    def embedding_generator(self, client_class):
+        """Real generator on the OpenAI path, with uncached embeddings."""
+        from src.processing.embeddings import EmbeddingGenerator
+        
+        with patch('src.processing.embeddings.settings') as mock_settings:
+            mock_settings.embedding_model = "text-embedding-ada-002"
+            mock_settings.batch_size = 32
+            mock_settings.openai_api_key = "test-key"
+            mock_settings.embedding_cache_size = 0
+            
+            generator = EmbeddingGenerator()
+            generator._model = "openai"
+            yield generator
+    
+    @pytest.mark.asyncio
+    async def test_sync_tool_wrapper_searches_on_its_own_loop(self, embedding_generator, client_class):
+        """Test the sync search wrapper works after the request loop has used the generator."""
+        search = AsyncMock(return_value=[{"text": "Found it", "score": 0.9, "metadata": {}}])
+        agent = LangChainReActAgent()
+        agent.doc_search_tool = DocumentSearchTool(search, {}, embedding_generator)
+        
+        # The request loop opens its client first
+        await embedding_generator.generate_embeddings(["warm up"])
+        
+        # LangChain runs sync tools in an executor thread, which gets a loop of its own
+        search_tool = agent._agent_tools()[0]
+        result = await asyncio.to_thread(search_tool.func, "what is it")
+        
+        assert "Found it" in result
+        assert client_class.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_tools_run_natively_async(self, embedding_generator, client_class):
+        """Test the agent's async path awaits the tools on the request loop."""
+        agent = LangChainReActAgent()
+        agent.doc_search_tool = DocumentSearchTool(async_return([]), {}, embedding_generator)
+        agent.system_info_tool = SystemInfoTool(Mock(list_documents=async_return(([], 3))))
+        search_tool, info_tool = agent._agent_tools()
         
-        assert "10 documents" in result
\ No newline at end of file
+        assert await search_tool.arun("anything") == "No relevant documents found for this query."
+        assert await info_tool.arun("how many") == "The system currently contains 3 documents."
+        client_class.assert_called_once()
@@ -16,23 +16,30 @@ from src.processing.redis_memory import (
 class TestRedisMemory:
     """Test Redis memory functionality."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def mock_redis(self):
         """Mock Redis client."""
         with patch('redis.Redis') as mock_class:
             mock_client = Mock()
             mock_class.return_value = mock_client
-            
-            # Mock basic Redis operations
-            mock_client.lrange.return_value = []
-            mock_client.lpush.return_value = 1
-            mock_client.delete.return_value = 1
-            mock_client.exists.return_value = 0
-            mock_client.expire.return_value = True
-            
             yield mock_client
     
-    @pytest.fixture
+    @pytest.fixture(autouse=True)
+    def reset_redis_mock(self, request):
+        """Give each test a fresh copy of the class-scoped Redis mock."""
+        if "mock_redis" not in request.fixturenames:
+            return
+        mock_client = request.getfixturevalue("mock_redis")
+        mock_client.reset_mock(return_value=True, side_effect=True)
+        
+        # Mock basic Redis operations
+        mock_client.lrange.return_value = []
+        mock_client.lpush.return_value = 1
+        mock_client.delete.return_value = 1
+        mock_client.exists.return_value = 0
+        mock_client.expire.return_value = True
+    
+    @pytest.fixture(scope="class")
     def mock_env(self):
         """Mock environment variables."""
         with patch.dict('os.environ', {
@@ -65,31 +72,50 @@ class TestRedisMemory:
 class TestRedisBackedChatHistory:
     """Test RedisBackedChatHistory class."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def mock_redis_history(self):
         """Mock RedisChatMessageHistory."""
         with patch('langchain_redis.RedisChatMessageHistory') as mock_class:
             mock_instance = Mock()
             mock_class.return_value = mock_instance
-            
-            # Mock messages property
-            mock_instance.messages = []
-            mock_instance.add_message = Mock()
-            mock_instance.clear = Mock()
-            
             yield mock_instance
     
-    def test_initialization_success(self):
+    @pytest.fixture(autouse=True)
+    def reset_redis_history_mock(self, request):
+        """Give each test a fresh copy of the class-scoped history mock."""
+        if "mock_redis_history" not in request.fixturenames:
+            return
+        mock_instance = request.getfixturevalue("mock_redis_history")
+        mock_instance.reset_mock(return_value=True, side_effect=True)
+        
+        # Mock messages property
+        mock_instance.messages = []
+        mock_instance.add_message = Mock()
+        mock_instance.clear = Mock()
+    
+    @pytest.fixture
+    def fake_redis(self):
+        """In-process Redis server, fresh for each test."""
+        fakeredis = pytest.importorskip("fakeredis")
+        return fakeredis.FakeRedis(decode_responses=True)
+    
+    @pytest.fixture(scope="session")
+    def serialized_history_msgs(self):
+        """Stored form of a two-message exchange, serialized once."""
+        import orjson
+        return [
+            orjson.dumps({"type": "HumanMessage", "content": "Hello"}),
+            orjson.dumps({"type": "AIMessage", "content": "Hi there!"}),
+        ]
+    
+    def test_initialization_success(self, fake_redis):
         """Test successful initialization."""
-        with patch('redis.Redis') as mock_redis:
-            mock_client = Mock()
-            mock_redis.return_value = mock_client
-            mock_client.ping.return_value = True
-            
+        with patch('redis.Redis', return_value=fake_redis):
             history = RedisBackedChatHistory(session_id="test-session")
             
             assert history.session_id == "test-session"
             assert history.key == "chat_history:test-session"
+            assert history.redis_client is fake_redis
     
     def test_initialization_redis_failure(self):
         """Test initialization when Redis connection fails."""
@@ -100,26 +126,20 @@ class TestRedisBackedChatHistory:
                 assert history.session_id == "test-session"
                 assert history.redis_client is None
     
-    def test_add_message_success(self):
+    def test_add_message_success(self, fake_redis):
         """Test adding message successfully."""
-        with patch('redis.Redis') as mock_redis:
-            mock_client = Mock()
-            mock_redis.return_value = mock_client
-            mock_client.ping.return_value = True
-            mock_client.rpush.return_value = 1
-            mock_client.ltrim.return_value = True
-            mock_client.expire.return_value = True
-            
+        with patch('redis.Redis', return_value=fake_redis):
             history = RedisBackedChatHistory(session_id="test-session")
-            
-            from langchain.schema import HumanMessage
-            message = HumanMessage(content="Test message")
-            
-            history.add_message(message)
-            
-            mock_client.rpush.assert_called_once()
-            mock_client.ltrim.assert_called_once_with("chat_history:test-session", -50, -1)
-            mock_client.expire.assert_called_once_with("chat_history:test-session", 86400)
+        
+        from langchain.schema import HumanMessage
+        for i in range(55):
+            history.add_message(HumanMessage(content=f"Test message {i}"))
+        
+        # Only the last 50 messages are kept, with a 24 hour expiry
+        stored = fake_redis.lrange("chat_history:test-session", 0, -1)
+        assert len(stored) == 50
+        assert json.loads(stored[-1]) == {"type": "HumanMessage", "content": "Test message 54"}
+        assert 0 < fake_redis.ttl("chat_history:test-session") <= 86400
     
     def test_add_message_no_redis(self):
         """Test adding message when Redis is not available."""
@@ -132,38 +152,40 @@ class TestRedisBackedChatHistory:
         # Should not raise error
         history.add_message(message)
     
-    def test_messages_property(self):
+    def test_messages_property(self, fake_redis, serialized_history_msgs):
         """Test messages property."""
-        with patch('redis.Redis') as mock_redis:
-            mock_client = Mock()
-            mock_redis.return_value = mock_client
-            mock_client.ping.return_value = True
-            
-            # Mock serialized messages
-            mock_client.lrange.return_value = [
-                '{"type": "HumanMessage", "content": "Hello"}',
-                '{"type": "AIMessage", "content": "Hi there!"}'
-            ]
-            
+        fake_redis.rpush("chat_history:test-session", *serialized_history_msgs)
+        
+        with patch('redis.Redis', return_value=fake_redis):
             history = RedisBackedChatHistory(session_id="test-session")
-            messages = history.messages
-            
-            assert len(messages) == 2
-            assert messages[0].content == "Hello"
-            assert messages[1].content == "Hi there!"
+        messages = history.messages
+        
+        assert len(messages) == 2
+        assert messages[0].content == "Hello"
+        assert messages[1].content == "Hi there!"
+        assert type(messages[1]).__name__ == "AIMessage"
     
-    def test_clear_success(self):
+    def test_messages_from_bytes_client(self, serialized_history_msgs):
+        """Test messages read from a client that returns raw bytes."""
+        fakeredis = pytest.importorskip("fakeredis")
+        client = fakeredis.FakeRedis()
+        client.rpush("chat_history:test-session", *serialized_history_msgs, b"not json")
+        
+        history = RedisBackedChatHistory(session_id="test-session", redis_client=client)
+        messages = history.messages
+        
+        assert [m.content for m in messages] == ["Hello", "Hi there!", "not json"]
+        assert type(messages[1]).__name__ == "AIMessage"
+    
+    def test_clear_success(self, fake_redis):
         """Test clearing messages successfully."""
-        with patch('redis.Redis') as mock_redis:
-            mock_client = Mock()
-            mock_redis.return_value = mock_client
-            mock_client.ping.return_value = True
-            mock_client.delete.return_value = 1
-            
+        fake_redis.rpush("chat_history:test-session", '{"type": "HumanMessage", "content": "Hello"}')
+        
+        with patch('redis.Redis', return_value=fake_redis):
             history = RedisBackedChatHistory(session_id="test-session")
-            history.clear()
-            
-            mock_client.delete.assert_called_once_with("chat_history:test-session")
+        history.clear()
+        
+        assert not fake_redis.exists("chat_history:test-session")
     
     def test_get_redis_history_langchain_available(self):
         """Test get_redis_history when langchain-redis is available."""
@@ -177,14 +199,11 @@ class TestRedisBackedChatHistory:
                 assert history == mock_instance
                 mock_redis_hist.assert_called_once()
     
-    def test_get_redis_history_fallback(self):
+    def test_get_redis_history_fallback(self, fake_redis):
         """Test get_redis_history fallback."""
         with patch('src.processing.redis_memory.REDIS_LANGCHAIN_AVAILABLE', False):
-            with patch('redis.Redis') as mock_redis:
-                mock_client = Mock()
-                mock_redis.return_value = mock_client
-                mock_client.ping.return_value = True
-                
+            with patch('redis.Redis', return_value=fake_redis):
                 history = get_redis_history("test-session")
                 
-                assert isinstance(history, RedisBackedChatHistory)
\ No newline at end of file
+                assert isinstance(history, RedisBackedChatHistory)
+                assert history.redis_client is fake_redis
\ No newline at end of file
@@ -1,19 +1,53 @@
 """
 Tests for the vector database module.
 """
+import asyncio
 import pytest
 import pytest_asyncio
-from unittest.mock import Mock, patch, MagicMock, call, AsyncMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock, call
 from datetime import datetime
+from collections import namedtuple
+from types import MappingProxyType
 import uuid
+import numpy as np
 
-from src.storage.vector_db import VectorStore
-from qdrant_client.models import PointStruct, Filter, FieldCondition, MatchValue
+from src.storage.vector_db import VectorStore, PAYLOAD_INDEXES
+from qdrant_client.http.exceptions import ResponseHandlingException
+from qdrant_client.models import Batch, PointStruct, Filter, FieldCondition, MatchValue
+
+
+# Every test patches its own Qdrant client, so the module can run on any one worker
+pytestmark = pytest.mark.xdist_group("vector_db")
+
+# Plain stand-in for Qdrant scored points and records; only attributes are read
+Point = namedtuple("Point", ["id", "score", "payload"], defaults=(None, None, None))
+
+# Stand-in for a facet value hit: a payload value and how many points carry it
+Hit = namedtuple("Hit", ["value", "count"])
+
+# Query and chunk embedding, built once; the store never mutates it
+_EMBEDDING = [0.1] * 1536
+
+# Chunk payload shared by the listing tests, read-only and copied per point
+_TEMPLATE_PAYLOAD = MappingProxyType({
+    "document_id": "doc-1",
+    "filename": "file1.txt",
+    "document_type": "txt",
+    "chunk_id": 0,
+    "timestamp": "2024-01-01T00:00:00"
+})
 
 
 class TestVectorStore:
     """Test VectorStore class."""
     
+    @pytest.fixture(autouse=True)
+    def reset_verified_collections(self):
+        """Start every test with no collection checked yet."""
+        VectorStore._verified_collections.clear()
+        yield
+        VectorStore._verified_collections.clear()
+    
     @pytest.fixture
     def mock_settings(self):
         """Mock settings for vector store."""
@@ -22,14 +56,20 @@ class TestVectorStore:
             mock_settings.qdrant_api_key = None
             mock_settings.qdrant_collection = "documents"
             mock_settings.embedding_dimension = 1536
+            mock_settings.qdrant_prefer_grpc = True
+            mock_settings.qdrant_grpc_port = 6334
+            mock_settings.search_cache_size = 16
+            mock_settings.search_cache_ttl = 60.0
             yield mock_settings
     
     @pytest.fixture
     def mock_qdrant_client(self):
         """Create mock Qdrant client."""
-        with patch('src.storage.vector_db.QdrantClient') as mock_class:
-            mock_client = Mock()
+        with patch('src.storage.vector_db.AsyncQdrantClient') as mock_class:
+            mock_client = AsyncMock()
             mock_class.return_value = mock_client
+            # The parallel uploader is the one blocking method on the async client
+            mock_client.upload_collection = Mock()
             
             # Mock get_collections
             mock_collection = Mock()
@@ -39,21 +79,28 @@ class TestVectorStore:
             # Mock get_collection for dimension check
             mock_collection_info = Mock()
             mock_collection_info.config.params.vectors.size = 1536
+            mock_collection_info.payload_schema = {
+                field_name: Mock() for field_name, _ in PAYLOAD_INDEXES
+            }
             mock_client.get_collection.return_value = mock_collection_info
             
+            mock_client.facet.return_value = Mock(hits=[])
+            
             yield mock_client
     
-    @pytest.fixture
-    def vector_store(self, mock_qdrant_client, mock_settings):
-        """Create VectorStore instance with mocked client."""
+    @pytest_asyncio.fixture
+    async def vector_store(self, mock_qdrant_client, mock_settings):
+        """Create VectorStore instance with mocked client and its collection checked."""
         with patch('src.storage.vector_db.logger'):
             store = VectorStore()
+            await store._ensure_ready()
             return store
     
-    def test_init_creates_collection_if_not_exists(self, mock_settings):
-        """Test collection creation on initialization."""
-        with patch('src.storage.vector_db.QdrantClient') as mock_class:
-            mock_client = Mock()
+    @pytest.mark.asyncio
+    async def test_init_creates_collection_if_not_exists(self, mock_settings):
+        """Test collection creation on first use."""
+        with patch('src.storage.vector_db.AsyncQdrantClient') as mock_class:
+            mock_client = AsyncMock()
             mock_class.return_value = mock_client
             
             # Mock no existing collections
@@ -61,24 +108,103 @@ class TestVectorStore:
             
             with patch('src.storage.vector_db.logger'):
                 store = VectorStore()
+                mock_client.get_collections.assert_not_called()
+                await store._ensure_ready()
+                await store._ensure_ready()
             
-            # Should create collection
+            # Should create collection once, with int8 quantization
             mock_client.create_collection.assert_called_once()
-            # Should create indices
-            assert mock_client.create_payload_index.call_count >= 1
+            create_kwargs = mock_client.create_collection.call_args[1]
+            assert create_kwargs['quantization_config'].scalar.type == "int8"
+            assert create_kwargs['quantization_config'].scalar.always_ram is True
+            assert create_kwargs['vectors_config'].on_disk is True
+            assert create_kwargs['on_disk_payload'] is True
+            # Should create every payload index
+            indexed = {
+                c[1]['field_name']: c[1]['field_schema']
+                for c in mock_client.create_payload_index.await_args_list
+            }
+            assert indexed == dict(PAYLOAD_INDEXES)
     
-    def test_init_does_not_create_existing_collection(self, mock_qdrant_client, mock_settings):
+    @pytest.mark.asyncio
+    async def test_init_does_not_create_existing_collection(self, mock_qdrant_client, mock_settings):
         """Test that existing collection is not recreated."""
         with patch('src.storage.vector_db.logger'):
             store = VectorStore()
+            await store._ensure_ready()
             mock_qdrant_client.create_collection.assert_not_called()
+            mock_qdrant_client.create_payload_index.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_existing_collection_gets_missing_indexes(self, mock_qdrant_client, mock_settings):
+        """Test indexes added in later releases are created on an existing collection."""
+        del mock_qdrant_client.get_collection.return_value.payload_schema["chunk_id"]
+        
+        with patch('src.storage.vector_db.logger'):
+            await VectorStore()._ensure_ready()
+        
+        mock_qdrant_client.create_collection.assert_not_called()
+        mock_qdrant_client.delete_collection.assert_not_called()
+        mock_qdrant_client.create_payload_index.assert_awaited_once_with(
+            collection_name="documents",
+            field_name="chunk_id",
+            field_schema="integer"
+        )
+    
+    @pytest.mark.asyncio
+    async def test_client_prefers_grpc(self, mock_settings):
+        """Test the client is built for the gRPC transport."""
+        with patch('src.storage.vector_db.AsyncQdrantClient') as mock_class:
+            with patch('src.storage.vector_db.logger'):
+                # The client is built on first use within a loop
+                VectorStore().client
+        
+        mock_class.assert_called_once_with(
+            url="http://localhost:6333",
+            prefer_grpc=True,
+            grpc_port=6334
+        )
+    
+    @pytest.mark.asyncio
+    async def test_each_event_loop_gets_its_own_client(self, vector_store, mock_qdrant_client):
+        """Test a store shared with another loop, like the agent's sync tools, builds a new client."""
+        from src.storage import vector_db
+        mock_qdrant_client.search.return_value = []
+        # Make the other loop take the setup lock too
+        vector_store._collection_ready = False
+        
+        async def search_on_other_loop():
+            return await vector_store.search(query_embedding=_EMBEDDING, limit=5)
+        
+        assert await asyncio.to_thread(asyncio.run, search_on_other_loop()) == []
+        assert vector_db.AsyncQdrantClient.call_count == 2
+        
+        # Shutdown closes the client of the loop it runs on
+        await vector_store.aclose()
+        mock_qdrant_client.close.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_collection_checked_once_per_process(self, mock_qdrant_client, mock_settings):
+        """Test a second store skips the collection and dimension check."""
+        with patch('src.storage.vector_db.logger'):
+            await VectorStore()._ensure_ready()
+            await VectorStore()._ensure_ready()
+        
+        mock_qdrant_client.get_collections.assert_called_once()
+        mock_qdrant_client.get_collection.assert_called_once()
+        
+        # A different collection is still checked
+        mock_settings.qdrant_collection = "other"
+        with patch('src.storage.vector_db.logger'):
+            await VectorStore()._ensure_ready()
+        assert mock_qdrant_client.get_collections.call_count == 2
     
     @pytest.mark.asyncio
     async def test_upsert_documents(self, vector_store, mock_qdrant_client):
         """Test adding documents with embeddings."""
         documents = [{
             "text": "Test chunk",
-            "embedding": [0.1] * 1536,
+            "embedding": _EMBEDDING,
             "chunk_id": 0,
             "metadata": {
                 "document_id": "doc-123",
@@ -98,22 +224,25 @@ class TestVectorStore:
         # Check the upsert call
         call_args = mock_qdrant_client.upsert.call_args[1]
         assert call_args['collection_name'] == 'documents'
-        assert len(call_args['points']) == 1
+        assert isinstance(call_args['points'], Batch)
+        assert len(call_args['points'].ids) == 1
+        assert call_args['points'].payloads[0]['document_id'] == "doc-123"
     
     @pytest.mark.asyncio
     async def test_search(self, vector_store, mock_qdrant_client):
         """Test similarity search."""
-        query_embedding = [0.1] * 1536
+        query_embedding = _EMBEDDING
         
         # Mock search results
-        mock_result = Mock()
-        mock_result.id = "chunk-1"
-        mock_result.score = 0.95
-        mock_result.payload = {
-            "text": "Similar content",
-            "document_id": "doc-123",
-            "source": "test.txt"
-        }
+        mock_result = Point(
+            id="chunk-1",
+            score=0.95,
+            payload={
+                "text": "Similar content",
+                "document_id": "doc-123",
+                "source": "test.txt"
+            }
+        )
         
         mock_qdrant_client.search.return_value = [mock_result]
         
@@ -130,7 +259,7 @@ class TestVectorStore:
     @pytest.mark.asyncio
     async def test_search_with_filter(self, vector_store, mock_qdrant_client):
         """Test search with metadata filter."""
-        query_embedding = [0.1] * 1536
+        query_embedding = _EMBEDDING
         filters = {"document_type": "pdf"}
         
         mock_qdrant_client.search.return_value = []
@@ -145,21 +274,61 @@ class TestVectorStore:
         call_args = mock_qdrant_client.search.call_args[1]
         assert 'query_filter' in call_args
         assert call_args['query_filter'] is not None
+        
+        # The same filter shape reuses one Filter object
+        await vector_store.search(query_embedding=query_embedding, limit=4, filters=dict(filters))
+        assert mock_qdrant_client.search.call_args[1]['query_filter'] is call_args['query_filter']
+        assert call_args['query_filter'].must[0].match.value == "pdf"
+    
+    @pytest.mark.asyncio
+    async def test_search_results_cached_until_write(self, vector_store, mock_qdrant_client):
+        """Test repeated searches are served from cache until the collection changes."""
+        mock_qdrant_client.search.return_value = [
+            Point(id="chunk-1", score=0.95, payload={"text": "Cached", "document_id": "doc-1"})
+        ]
+        mock_qdrant_client.count.return_value.count = 1
+        
+        first = await vector_store.search(query_embedding=_EMBEDDING, limit=5)
+        first[0]["score"] = 0.0
+        second = await vector_store.search(query_embedding=_EMBEDDING, limit=5)
+        
+        assert mock_qdrant_client.search.call_count == 1
+        assert second[0]["score"] == 0.95
+        
+        await vector_store.search(query_embedding=_EMBEDDING, limit=3)
+        assert mock_qdrant_client.search.call_count == 2
+        
+        await vector_store.delete_document("doc-1")
+        await vector_store.search(query_embedding=_EMBEDDING, limit=5)
+        assert mock_qdrant_client.search.call_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_recreate_collection_drops_cached_results(self, vector_store, mock_qdrant_client):
+        """Test recreating the collection rebuilds it and forgets cached searches."""
+        mock_qdrant_client.search.return_value = [
+            Point(id="chunk-1", score=0.95, payload={"text": "Old", "document_id": "doc-1"})
+        ]
+        await vector_store.search(query_embedding=_EMBEDDING, limit=5)
+        
+        await vector_store.recreate_collection()
+        
+        mock_qdrant_client.delete_collection.assert_awaited_once_with("documents")
+        mock_qdrant_client.create_collection.assert_awaited_once()
+        await vector_store.search(query_embedding=_EMBEDDING, limit=5)
+        assert mock_qdrant_client.search.call_count == 2
     
     @pytest.mark.asyncio
     async def test_hybrid_search(self, vector_store, mock_qdrant_client):
         """Test hybrid search combining vector and text search."""
-        query_embedding = [0.1] * 1536
+        query_embedding = _EMBEDDING
         query_text = "test query"
         
         # Mock both vector and text search results
-        mock_vector_result = Mock()
-        mock_vector_result.id = "chunk-1"
-        mock_vector_result.score = 0.95
-        mock_vector_result.payload = {
-            "text": "Vector result",
-            "document_id": "doc-1"
-        }
+        mock_vector_result = Point(
+            id="chunk-1",
+            score=0.95,
+            payload={"text": "Vector result", "document_id": "doc-1"}
+        )
         
         mock_qdrant_client.search.return_value = [mock_vector_result]
         
@@ -171,38 +340,57 @@ class TestVectorStore:
         
         assert len(results) >= 0  # Results depend on implementation
     
+    @pytest.mark.asyncio
+    async def test_hybrid_search_blends_and_ranks(self, vector_store, mock_qdrant_client):
+        """Test keyword matches can outrank a closer vector match."""
+        mock_qdrant_client.search.return_value = [
+            Point(id="chunk-1", score=0.9, payload={"text": "Unrelated text"}),
+            Point(id="chunk-2", score=0.6, payload={"text": "All about Qdrant search"}),
+            Point(id="chunk-3", score=0.5, payload={"text": "Nothing here"}),
+        ]
+        
+        results = await vector_store.hybrid_search(
+            query_embedding=_EMBEDDING,
+            query_text="qdrant search",
+            limit=2,
+            alpha=0.5
+        )
+        
+        assert [r["id"] for r in results] == ["chunk-2", "chunk-1"]
+        assert results[0]["keyword_score"] == 1.0
+        assert results[0]["vector_score"] == 0.6
+        assert results[0]["score"] == pytest.approx(0.8)
+        assert results[1]["score"] == pytest.approx(0.45)
+    
     @pytest.mark.asyncio
     async def test_list_documents(self, vector_store, mock_qdrant_client):
         """Test listing documents."""
-        # Mock scroll results
+        # Mock first-chunk scroll results and per-document chunk counts
         mock_records = [
-            Mock(payload={
-                "document_id": "doc-1",
-                "filename": "file1.txt",
-                "document_type": "txt",
-                "chunk_id": 0,
-                "timestamp": "2024-01-01T00:00:00"
-            }),
-            Mock(payload={
-                "document_id": "doc-1",
-                "filename": "file1.txt",
-                "document_type": "txt",
-                "chunk_id": 1,
-                "timestamp": "2024-01-01T00:00:00"
-            }),
-            Mock(payload={
+            Point(payload={**_TEMPLATE_PAYLOAD}),
+            Point(payload={
+                **_TEMPLATE_PAYLOAD,
                 "document_id": "doc-2",
                 "filename": "file2.pdf",
                 "document_type": "pdf",
-                "chunk_id": 0,
                 "timestamp": "2024-01-02T00:00:00"
             })
         ]
         
         mock_qdrant_client.scroll.return_value = (mock_records, None)
+        mock_qdrant_client.facet.return_value = Mock(hits=[Hit("doc-1", 2), Hit("doc-2", 1)])
         
         documents, total = await vector_store.list_documents(offset=0, limit=10)
         
+        # Only first chunks are scrolled; counts come from one exact facet over the page
+        scroll_filter = mock_qdrant_client.scroll.call_args[1]['scroll_filter']
+        assert scroll_filter.must[0].key == "chunk_id"
+        assert scroll_filter.must[0].match.value == 0
+        facet_kwargs = mock_qdrant_client.facet.call_args[1]
+        assert facet_kwargs['key'] == "document_id"
+        assert facet_kwargs['exact'] is True
+        assert facet_kwargs['facet_filter'].must[0].match.any == ["doc-2", "doc-1"]
+        
         assert len(documents) == 2  # Two unique documents
         assert total == 2
         # Documents are sorted by timestamp, doc-2 should be first (newer)
@@ -211,6 +399,21 @@ class TestVectorStore:
         assert documents[1]["document_id"] == "doc-1"
         assert documents[1]["chunk_count"] == 2
     
+    @pytest.mark.asyncio
+    async def test_list_documents_skips_orphan_chunks(self, vector_store, mock_qdrant_client):
+        """Test chunks without a document ID are not listed."""
+        mock_qdrant_client.scroll.return_value = ([
+            Point(payload={**_TEMPLATE_PAYLOAD}),
+            Point(payload={"chunk_id": 0}),
+        ], None)
+        mock_qdrant_client.facet.return_value = Mock(hits=[Hit("doc-1", 2)])
+        
+        documents, total = await vector_store.list_documents()
+        
+        assert total == 1
+        assert documents[0]["chunk_count"] == 2
+        assert documents[0]["filename"] == "file1.txt"
+    
     @pytest.mark.asyncio
     async def test_delete_document(self, vector_store, mock_qdrant_client):
         """Test deleting a document."""
@@ -218,28 +421,28 @@ class TestVectorStore:
         
         # Mock delete operation  
         mock_qdrant_client.delete.return_value = None
-        # Mock count after delete
-        mock_qdrant_client.count.return_value = Mock(count=95)
         
         result = await vector_store.delete_document(document_id)
         
         assert result is True
         mock_qdrant_client.delete.assert_called_once()
+        mock_qdrant_client.count.assert_not_called()
         
-        # Check filter used
+        # Check filter used, and that the delete is applied before the search cache is cleared
         call_args = mock_qdrant_client.delete.call_args[1]
         assert call_args['collection_name'] == 'documents'
+        assert call_args['points_selector'].filter.must[0].match.value == document_id
+        assert call_args['wait'] is True
     
     @pytest.mark.asyncio
     async def test_list_documents_multiple(self, vector_store, mock_qdrant_client):
         """Test listing multiple documents with pagination."""
         # Mock first page
         mock_records_page1 = [
-            Mock(payload={
+            Point(payload={
+                **_TEMPLATE_PAYLOAD,
                 "document_id": f"doc-{i}",
                 "filename": f"file{i}.txt",
-                "document_type": "txt",
-                "chunk_id": 0,
                 "timestamp": f"2024-01-{str(i+1).zfill(2)}T00:00:00"
             }) for i in range(10)
         ]
@@ -252,6 +455,43 @@ class TestVectorStore:
         # Documents are sorted by timestamp in reverse order (newest first)
         assert all(doc["document_id"] == f"doc-{9-i}" for i, doc in enumerate(documents))
     
+    @pytest.mark.asyncio
+    async def test_list_documents_offset_page(self, vector_store, mock_qdrant_client):
+        """Test a later page holds the next newest documents."""
+        mock_qdrant_client.scroll.return_value = ([
+            Point(payload={**_TEMPLATE_PAYLOAD, "document_id": f"doc-{i}", "timestamp": i})
+            for i in range(10)
+        ], None)
+        
+        documents, total = await vector_store.list_documents(offset=3, limit=4)
+        
+        assert total == 10
+        assert [doc["document_id"] for doc in documents] == ["doc-6", "doc-5", "doc-4", "doc-3"]
+        
+        # Only the listed fields are fetched, never chunk text or vectors
+        scroll_kwargs = mock_qdrant_client.scroll.call_args[1]
+        assert "text" not in scroll_kwargs['with_payload'].include
+        assert "document_id" in scroll_kwargs['with_payload'].include
+        assert scroll_kwargs['with_vectors'] is False
+    
+    @pytest.mark.asyncio
+    async def test_list_documents_follows_scroll_pages(self, vector_store, mock_qdrant_client):
+        """Test every scroll page is read, not just the first."""
+        mock_qdrant_client.scroll.side_effect = [
+            ([Point(payload={**_TEMPLATE_PAYLOAD, "document_id": "doc-1", "timestamp": 1})], "page-2"),
+            ([
+                Point(payload={**_TEMPLATE_PAYLOAD, "document_id": "doc-3", "timestamp": 3}),
+                Point(payload={**_TEMPLATE_PAYLOAD, "document_id": "doc-2", "timestamp": 2}),
+            ], None),
+        ]
+        
+        documents, total = await vector_store.list_documents(offset=0, limit=2)
+        
+        assert total == 3
+        assert [doc["document_id"] for doc in documents] == ["doc-3", "doc-2"]
+        offsets = [c[1]['offset'] for c in mock_qdrant_client.scroll.call_args_list]
+        assert offsets == [None, "page-2"]
+    
     @pytest.mark.asyncio
     async def test_get_collection_stats(self, vector_store, mock_qdrant_client):
         """Test getting collection statistics."""
@@ -280,9 +520,39 @@ class TestVectorStore:
         
         with pytest.raises(Exception, match="Search failed"):
             await vector_store.search(
-                query_embedding=[0.1] * 1536,
+                query_embedding=_EMBEDDING,
                 limit=5
             )
+        
+        # Errors that aren't transient are not retried
+        assert mock_qdrant_client.search.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_search_retries_transient_errors(self, vector_store, mock_qdrant_client):
+        """Test a dropped connection is retried and the query still succeeds."""
+        mock_qdrant_client.search.side_effect = [
+            ResponseHandlingException(ConnectionError("reset")),
+            [Point(id="chunk-1", score=0.9, payload={"text": "Recovered"})]
+        ]
+        
+        with patch('src.storage.vector_db.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            results = await vector_store.search(query_embedding=_EMBEDDING, limit=5)
+        
+        assert results[0]["text"] == "Recovered"
+        assert mock_qdrant_client.search.call_count == 2
+        mock_sleep.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_search_gives_up_after_max_attempts(self, vector_store, mock_qdrant_client):
+        """Test persistent transient errors surface after the last attempt."""
+        from src.storage.vector_db import SEARCH_ATTEMPTS
+        mock_qdrant_client.search.side_effect = ResponseHandlingException(ConnectionError("down"))
+        
+        with patch('src.storage.vector_db.asyncio.sleep', new=AsyncMock()):
+            with pytest.raises(ResponseHandlingException):
+                await vector_store.search(query_embedding=_EMBEDDING, limit=5)
+        
+        assert mock_qdrant_client.search.call_count == SEARCH_ATTEMPTS
     
     @pytest.mark.asyncio
     async def test_batch_upsert_documents(self, vector_store, mock_qdrant_client):
@@ -290,7 +560,7 @@ class TestVectorStore:
         documents = [
             {
                 "text": f"Test chunk {i}",
-                "embedding": [0.1 * i] * 1536,
+                "embedding": _EMBEDDING,
                 "chunk_id": i,
                 "metadata": {
                     "document_id": f"doc-{i//5}",
@@ -309,5 +579,105 @@ class TestVectorStore:
         unique_docs = set(result)
         assert len(unique_docs) == 20  # 100 chunks / 5 chunks per doc
         
-        # Check batching
-        assert mock_qdrant_client.upsert.call_count > 0
\ No newline at end of file
+        # Everything fits in one default-sized batch
+        mock_qdrant_client.upsert.assert_called_once()
+        points = mock_qdrant_client.upsert.call_args[1]['points']
+        assert isinstance(points, Batch)
+        assert len(points.ids) == len(points.vectors) == len(points.payloads) == 100
+        # Chunks ingested together share one timestamp
+        assert len({payload["timestamp"] for payload in points.payloads}) == 1
+    
+    @pytest.mark.asyncio
+    async def test_reingested_chunks_keep_their_point_ids(self, vector_store, mock_qdrant_client):
+        """Test the same document chunk maps to the same point ID on every upsert."""
+        documents = [
+            {"text": "First", "embedding": _EMBEDDING, "metadata": {"document_id": "doc-1", "chunk_id": 0}},
+            {"text": "Second", "embedding": _EMBEDDING, "metadata": {"document_id": "doc-1", "chunk_id": 1}},
+        ]
+        mock_qdrant_client.count.return_value.count = 2
+        
+        await vector_store.upsert_documents(documents)
+        await vector_store.upsert_documents(documents)
+        
+        first, second = [c[1]['points'].ids for c in mock_qdrant_client.upsert.call_args_list]
+        assert first == second
+        assert len(set(first)) == 2
+        uuid.UUID(first[0])  # Still a valid UUID for Qdrant
+        
+        # Chunks without a stable identity still get unique IDs
+        anonymous = [{"text": "Loose", "embedding": _EMBEDDING}] * 2
+        await vector_store.upsert_documents(anonymous)
+        loose_ids = mock_qdrant_client.upsert.call_args[1]['points'].ids
+        assert len(set(loose_ids)) == 2
+    
+    @pytest.mark.asyncio
+    async def test_bulk_upsert_uploads_in_parallel(self, vector_store, mock_qdrant_client):
+        """Test loads past the threshold go through upload_collection."""
+        from src.storage.vector_db import PARALLEL_UPLOAD_THRESHOLD
+        documents = [
+            {"text": f"Chunk {i}", "embedding": _EMBEDDING, "chunk_id": i}
+            for i in range(PARALLEL_UPLOAD_THRESHOLD)
+        ]
+        mock_qdrant_client.count.return_value.count = PARALLEL_UPLOAD_THRESHOLD
+        
+        result = await vector_store.upsert_documents(documents, batch_size=256, parallel=8)
+        
+        mock_qdrant_client.upsert.assert_not_called()
+        kwargs = mock_qdrant_client.upload_collection.call_args[1]
+        assert kwargs['parallel'] == 8
+        assert kwargs['batch_size'] == 256
+        assert len(kwargs['ids']) == len(kwargs['vectors']) == len(kwargs['payload']) == len(result)
+        assert kwargs['payload'][0]["text"] == "Chunk 0"
+        assert kwargs['vectors'].dtype == np.float32
+        assert kwargs['vectors'].shape == (PARALLEL_UPLOAD_THRESHOLD, len(_EMBEDDING))
+        
+        # A single process keeps the plain upsert path
+        mock_qdrant_client.upload_collection.reset_mock()
+        await vector_store.upsert_documents(documents, parallel=1)
+        mock_qdrant_client.upload_collection.assert_not_called()
+        assert mock_qdrant_client.upsert.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_bulk_mode_pauses_indexing(self, vector_store, mock_qdrant_client):
+        """Test bulk mode disables indexing for the load and restores it after."""
+        from src.storage.vector_db import DEFAULT_INDEXING_THRESHOLD
+        documents = [{"text": "Chunk", "embedding": _EMBEDDING}]
+        mock_qdrant_client.count.return_value.count = 1
+        
+        await vector_store.upsert_documents(documents, bulk_mode=True)
+        
+        thresholds = [
+            c[1]['optimizers_config'].indexing_threshold
+            for c in mock_qdrant_client.update_collection.call_args_list
+        ]
+        assert thresholds == [0, DEFAULT_INDEXING_THRESHOLD]
+        
+        # Indexing comes back even when the load fails
+        mock_qdrant_client.update_collection.reset_mock()
+        mock_qdrant_client.upsert.side_effect = Exception("Upsert failed")
+        with pytest.raises(Exception, match="Upsert failed"):
+            await vector_store.upsert_documents(documents, bulk_mode=True)
+        assert mock_qdrant_client.update_collection.call_count == 2
+        
+        # Regular upserts leave the collection config alone
+        mock_qdrant_client.update_collection.reset_mock()
+        mock_qdrant_client.upsert.side_effect = None
+        await vector_store.upsert_documents(documents)
+        mock_qdrant_client.update_collection.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_upsert_documents_in_batches(self, vector_store, mock_qdrant_client):
+        """Test points are split into batch_size requests."""
+        documents = [
+            {"text": f"Chunk {i}", "embedding": _EMBEDDING, "chunk_id": i}
+            for i in range(100)
+        ]
+        mock_qdrant_client.count.return_value.count = 100
+        
+        result = await vector_store.upsert_documents(documents, batch_size=30)
+        
+        batch_sizes = [
+            len(c[1]['points'].ids) for c in mock_qdrant_client.upsert.call_args_list
+        ]
+        assert batch_sizes == [30, 30, 30, 10]
+        assert len(result) == 100
\ No newline at end of file